@@ -0,0 +1,22 @@
+"""
+ASGI config for IIS project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Live match event streams are served next to Django, run with any ASGI server,
+e.g. ``uvicorn IIS.asgi:application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'IIS.settings')
+
+django_application = get_asgi_application()
+
+from leagues.live_feed import live_feed_router  # noqa: E402 (requires configured Django)
+
+application = live_feed_router(django_application)
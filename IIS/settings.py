@@ -50,13 +50,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'leagues.instrumentation.RequestStatsMiddleware',
 ]
 
 ROOT_URLCONF = 'IIS.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Django templates measuring render time, see leagues.instrumentation
+        'BACKEND': 'leagues.instrumentation.InstrumentedTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')]
         ,
         'APP_DIRS': True,
@@ -85,6 +87,61 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+# Local memory cache is private to each process, invalidation by signals
+# reaches only the process which saved the rows, other processes serve cached
+# values until they expire after TIMEOUT seconds. Use a shared backend when
+# running multiple worker processes, see settings_postgres
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'leagues',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+
+# Request statistics
+# Latency, SQL queries and template render time of every request are logged
+# as JSON lines to a rotating file, see leagues.instrumentation. Benchmarks
+# turn the logging off with REQUEST_STATS
+
+REQUEST_STATS = True
+REQUEST_STATS_FILE = os.path.join(BASE_DIR, 'request_stats.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {
+            'format': '%(message)s',
+        },
+    },
+    'handlers': {
+        'request_stats': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': REQUEST_STATS_FILE,
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'formatter': 'message',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'leagues.request_stats': {
+            'handlers': ['request_stats'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,79 @@
+"""
+PostgreSQL profile of IIS settings, select it with
+DJANGO_SETTINGS_MODULE=IIS.settings_postgres. The default settings keep
+using SQLite for development.
+
+Connection is configured by environment variables:
+    POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT
+        primary database
+    POSTGRES_REPLICAS
+        comma separated host[:port] list of read replicas, see leagues.db_routing
+    POSTGRES_CONN_MAX_AGE
+        lifetime of persistent connections in seconds, 0 closes connections
+        after each request
+    POSTGRES_PGBOUNCER
+        set to 1 when connecting through PgBouncer in transaction pooling mode
+    MEMCACHED_LOCATION
+        comma separated host:port list of memcached servers, the cache is kept
+        in files under CACHE_DIRECTORY otherwise
+"""
+
+import os
+import tempfile
+from IIS.settings import *  # noqa: F401,F403
+from IIS.settings import MIDDLEWARE
+
+
+def postgres_database(host, port):
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.environ.get('POSTGRES_DB', 'leagues'),
+        'USER': os.environ.get('POSTGRES_USER', 'leagues'),
+        'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+        'HOST': host,
+        'PORT': port,
+        # Persistent connections save connection setup on every request
+        'CONN_MAX_AGE': int(os.environ.get('POSTGRES_CONN_MAX_AGE', 60)),
+        # Transaction pooling hands each transaction to any server connection,
+        # named cursors can't outlive the transaction there
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('POSTGRES_PGBOUNCER') == '1',
+    }
+
+
+DATABASES = {
+    'default': postgres_database(os.environ.get('POSTGRES_HOST', 'localhost'),
+                                 os.environ.get('POSTGRES_PORT', '5432')),
+}
+
+for number, address in enumerate(filter(None, os.environ.get('POSTGRES_REPLICAS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    replica = postgres_database(host, port or '5432')
+    # Tests read the test database of the primary instead of creating their own
+    replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES['replica_{0}'.format(number)] = replica
+
+DATABASE_ROUTERS = ['leagues.db_routing.ReplicaRouter']
+
+# Worker processes share the cache, so invalidation by signals reaches all of
+# them. Memcached is shared by all hosts, files only by workers of one host
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ['MEMCACHED_LOCATION'].split(','),
+            'TIMEOUT': 3600,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIRECTORY', os.path.join(tempfile.gettempdir(), 'leagues_cache')),
+            'TIMEOUT': 3600,
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,
+            },
+        }
+    }
+
+MIDDLEWARE = MIDDLEWARE + ['leagues.db_routing.PrimaryForWritesMiddleware']
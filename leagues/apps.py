@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class LeaguesConfig(AppConfig):
     name = 'leagues'
+
+    def ready(self):
+        # Connect signal handlers
+        from leagues import signals
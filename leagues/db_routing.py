@@ -0,0 +1,58 @@
+import contextvars
+import random
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Routing of queries between the primary database ('default' alias) and its
+# read replicas, all other aliases in DATABASES. Writes always go to the
+# primary. Reads go to a random replica unless they have to see rows written
+# just before: inside transactions, during requests with side effects and for
+# sessions and users, which are read right after login or signup. Replicas
+# lag behind the primary, so a page rendered after a redirect may still miss
+# the newest rows for a moment
+
+# Whether reads of the request being processed in current thread or task go to
+# the primary, set by PrimaryForWritesMiddleware
+primary_reads = contextvars.ContextVar('primary_reads', default=False)
+
+# Methods of requests without side effects
+READ_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+
+# Applications whose models are always read from the primary
+PRIMARY_APPS = {'sessions', 'auth'}
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = replica_aliases()
+        if not replicas or primary_reads.get() or model._meta.app_label in PRIMARY_APPS \
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema by replication
+        return db == DEFAULT_DB_ALIAS
+
+
+class PrimaryForWritesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = primary_reads.set(request.method not in READ_METHODS)
+        try:
+            return self.get_response(request)
+        finally:
+            primary_reads.reset(token)
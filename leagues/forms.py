@@ -223,12 +223,9 @@ class ClanForm(ModelForm):
 
         if clan.pk:
             # When editing, foundation date cannot be after first match (if any)
-            matches = clan.all_matches
-            for match in matches:
-                # queryset filter somehow doesnt work on datetimes...
-                begin_datetime = match.beginning
-                if begin_datetime.date() < foundation_date:
-                    raise ValidationError('Clan cannot be founded after first played match')
+            first_match = clan.first_match_date
+            if first_match and first_match < foundation_date:
+                raise ValidationError('Clan cannot be founded after first played match')
 
             if 'leader' in self.changed_data:
                 # Changing leader of the clan
@@ -276,12 +273,9 @@ class TeamForm(ModelForm):
 
         if team.pk:
             # When editing, foundation date cannot be after first match (if any)
-            matches = team.all_matches.all()
-            for match in matches:
-                # queryset filter somehow doesnt work on datetimes...
-                begin_datetime = match.beginning
-                if begin_datetime.date() < foundation_date:
-                    raise ValidationError('Team cannot be founded after first played match')
+            first_match = team.first_match_date
+            if first_match and first_match < foundation_date:
+                raise ValidationError('Team cannot be founded after first played match')
 
             if 'leader' in self.changed_data:
                 # Changing leader of the team
@@ -353,13 +347,11 @@ class GameForm(ModelForm):
             submit_genre = cleaned_data['genre']
             submit_modes = cleaned_data['game_modes']
             if release_date:
-                matches = game.match_set.all()
-                for match in matches:
-                    begin_datetime = match.beginning
-                    if begin_datetime.date() < release_date:
-                        raise ValidationError('Game cannot be released after first played match')
+                first_match = game.first_match_date
+                if first_match and first_match < release_date:
+                    raise ValidationError('Game cannot be released after first played match')
 
-            if game.genre != submit_genre and game.match_set.all().count() > 0:
+            if game.genre != submit_genre and game.match_set.exists():
                 raise ValidationError('Cannot change genre of game with existing matches')
 
             removed_modes = game.game_modes.all().difference(submit_modes)
@@ -0,0 +1,172 @@
+import contextvars
+import glob
+import json
+import logging
+import re
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import DjangoTemplates, Template, reraise
+
+# Per request statistics of views: latency, number and time of SQL queries,
+# queries executed repeatedly (typical for N+1 problems) and time spent
+# rendering templates. Records are written as JSON lines by the
+# 'leagues.request_stats' logger, see LOGGING in settings
+
+logger = logging.getLogger('leagues.request_stats')
+
+# Statistics of the request being processed in current thread or task
+current_stats = contextvars.ContextVar('request_stats', default=None)
+
+# Number of repeated queries stored with each record
+DUPLICATES_LIMIT = 5
+
+
+def query_fingerprint(sql):
+    # Queries differing only in literals or length of IN lists share fingerprint
+    sql = re.sub(r"'[^']*'", '?', sql)
+    sql = re.sub(r'\b\d+\b', '?', sql)
+    sql = re.sub(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)', '(...)', sql)
+    return sql
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = Counter()
+        self.query_count = 0
+        self.query_time = 0.0
+        self.template_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # Database execute wrapper
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - start
+            self.query_count += 1
+            self.queries[query_fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return [{'sql': sql, 'count': count}
+                for sql, count in self.queries.most_common(DUPLICATES_LIMIT) if count > 1]
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current_stats.get()
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            if stats is not None:
+                stats.template_time += time.perf_counter() - start
+
+
+# Django template backend measuring render time of templates
+class InstrumentedTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return InstrumentedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class RequestStatsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.REQUEST_STATS:
+            return self.get_response(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats))
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'time': time.time(),
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'latency': round((time.perf_counter() - start) * 1000, 2),
+            'queries': stats.query_count,
+            'query_time': round(stats.query_time * 1000, 2),
+            'template_time': round(stats.template_time * 1000, 2),
+            'duplicates': stats.duplicates(),
+        }))
+        return response
+
+
+def read_records(path=None):
+    # Records from the log file and its rotated backups, oldest first. Backups
+    # have numeric suffixes, other files next to the log are left out
+    path = path or settings.REQUEST_STATS_FILE
+    backups = [name for name in glob.glob(glob.escape(path) + '.*') if name.rsplit('.', 1)[1].isdigit()]
+    backups.sort(key=lambda name: -int(name.rsplit('.', 1)[1]))
+    records = []
+    for name in backups + [path]:
+        try:
+            with open(name) as log:
+                records.extend(parse_records(log))
+        except FileNotFoundError:
+            continue
+    return records
+
+
+def parse_records(lines):
+    # Several processes write the log, a line cut by a crash or a rotation
+    # isn't a record
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+# Aggregates records by view, returns list of dictionaries sorted by given key
+def summarize(records, sort='latency_p95'):
+    views = defaultdict(list)
+    for record in records:
+        views[record['view'] or '(unresolved)'].append(record)
+
+    summary = []
+    for view, rows in views.items():
+        duplicates = Counter()
+        for row in rows:
+            for duplicate in row['duplicates']:
+                duplicates[duplicate['sql']] = max(duplicates[duplicate['sql']], duplicate['count'])
+        latencies = [row['latency'] for row in rows]
+        queries = [row['queries'] for row in rows]
+        summary.append({
+            'view': view,
+            'requests': len(rows),
+            'latency_avg': round(sum(latencies) / len(rows), 2),
+            'latency_p95': percentile(latencies, 0.95),
+            'queries_avg': round(sum(queries) / len(rows), 1),
+            'queries_max': max(queries),
+            'query_time_avg': round(sum(row['query_time'] for row in rows) / len(rows), 2),
+            'template_time_avg': round(sum(row['template_time'] for row in rows) / len(rows), 2),
+            'duplicates': [{'sql': sql, 'count': count} for sql, count in duplicates.most_common(DUPLICATES_LIMIT)],
+        })
+    return sorted(summary, key=lambda row: row[sort], reverse=sort != 'view')
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import re
+from datetime import timedelta
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.template.loader import render_to_string
+from django.utils import timezone
+from leagues.models import Match, parse_match_time
+
+# Server-sent events feed of deaths in running matches. Each live match has one
+# producer task which sleeps until the next death becomes visible, loads it once
+# and fans it out to queues of all subscribed clients. Feeds live in the process
+# of the ASGI server, so no external broker is needed
+
+EVENTS_PATH = re.compile(r'^/match/(?P<match_id>\d+)/events/$')
+KEEPALIVE_SECONDS = 15
+
+# Running feeds by match ID
+feeds = {}
+
+
+@sync_to_async
+def load_match(match_id):
+    return Match.objects.filter(pk=match_id).first()
+
+
+@sync_to_async
+def load_next_event_time(match, after):
+    deaths = match.death_set.filter(match_time__gt=after).order_by('match_time')
+    return deaths.values_list('match_time', flat=True).first()
+
+
+# Returns list of (match time in seconds, rendered table row) tuples
+@sync_to_async
+def load_events(match, after, until):
+    return [(death.match_time.total_seconds(),
+             render_to_string('leagues/death_row.html', {'death': death, 'visible': True}))
+            for death in match.deaths_between(after, until)]
+
+
+def format_event(name, data):
+    return 'event: {0}\ndata: {1}\n\n'.format(name, json.dumps(data)).encode()
+
+
+class MatchFeed:
+    def __init__(self, match):
+        self.match = match
+        self.cursor = match.elapsed
+        self.subscribers = set()
+        self.task = None
+
+    def broadcast(self, events):
+        for queue in self.subscribers:
+            queue.put_nowait(events)
+
+    async def produce(self):
+        try:
+            while self.subscribers:
+                next_time = await load_next_event_time(self.match, self.cursor)
+                if next_time is None:
+                    break
+                delay = (self.match.beginning + next_time - timezone.now()).total_seconds()
+                await asyncio.sleep(max(0.0, delay))
+                until = self.match.elapsed
+                events = await load_events(self.match, self.cursor, until)
+                self.cursor = until
+                self.broadcast(events)
+        finally:
+            # None tells subscribers that there will be no more events
+            if feeds.get(self.match.id) is self:
+                del feeds[self.match.id]
+            self.broadcast(None)
+
+    # Registers queue of a client and returns events the client missed since
+    # the given cursor. Registration and snapshot of the feed cursor happen
+    # without awaiting, so broadcasts continue exactly after the snapshot
+    async def subscribe(self, queue, after):
+        self.subscribers.add(queue)
+        cursor = self.cursor
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.produce())
+        if after < cursor:
+            return await load_events(self.match, after, cursor)
+        return []
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers and self.task is not None:
+            # Nobody listens, new clients will start a new feed. A newer feed
+            # may already be registered if this one's producer has ended
+            if feeds.get(self.match.id) is self:
+                del feeds[self.match.id]
+            self.task.cancel()
+
+
+async def wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def events_application(scope, receive, send, match_id):
+    query = parse_qs(scope['query_string'].decode('latin-1'))
+    try:
+        after = parse_match_time(query.get('after', ['0'])[0])
+    except (ValueError, OverflowError):
+        after = timedelta(0)
+
+    match = await load_match(match_id)
+    if match is None or not match.in_progress:
+        await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache')],
+    })
+
+    feed = feeds.get(match.id)
+    if feed is None:
+        feed = feeds[match.id] = MatchFeed(match)
+    queue = asyncio.Queue()
+    disconnect = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        events = await feed.subscribe(queue, after)
+        while events is not None:
+            # Client may already have events rendered with the page
+            rows = [row for time, row in events if time > after.total_seconds()]
+            if rows:
+                data = {'rows': ''.join(rows), 'cursor': events[-1][0]}
+                await send({'type': 'http.response.body', 'body': format_event('deaths', data), 'more_body': True})
+
+            next_events = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait([next_events, disconnect], timeout=KEEPALIVE_SECONDS,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                next_events.cancel()
+                return
+            if next_events in done:
+                events = next_events.result()
+            else:
+                next_events.cancel()
+                events = []
+                await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+
+        await send({'type': 'http.response.body', 'body': format_event('end', {}), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        feed.unsubscribe(queue)
+        disconnect.cancel()
+        # Requests of the feed bypass Django request signals which close connections
+        await sync_to_async(close_old_connections)()
+
+
+# Wraps Django ASGI application, requests for match event streams
+# are served by the feed, everything else is passed to Django
+def live_feed_router(application):
+    async def router(scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            path = EVENTS_PATH.match(scope['path'])
+            if path:
+                return await events_application(scope, receive, send, int(path.group('match_id')))
+        return await application(scope, receive, send)
+    return router
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.db.models import Max
+from django.core.management.base import BaseCommand, CommandError
+from leagues.models import PlayedMatch, invalidate_model_cache
+
+
+class Command(BaseCommand):
+    help = ('Fills stored outcome, kills, deaths and assists of played matches written before the columns '
+            'existed or recomputes them from matches, deaths and assists')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Number of played matches updated in one transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('Batch size must be positive')
+
+        # Ranges of primary keys keep every UPDATE and its locks short
+        last = PlayedMatch.objects.aggregate(last=Max('pk'))['last'] or 0
+        updated = 0
+        for start in range(0, last, batch_size):
+            with transaction.atomic():
+                updated += PlayedMatch.objects.filter(pk__gt=start, pk__lte=start + batch_size).fill_stats()
+            self.stdout.write('{0} played matches'.format(updated))
+
+        invalidate_model_cache(PlayedMatch)
+        self.stdout.write(self.style.SUCCESS('Filled statistics of {0} played matches'.format(updated)))
@@ -0,0 +1,203 @@
+import statistics
+import time
+from collections import Counter
+from contextlib import ExitStack
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, reset_queries
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_databases, teardown_databases, setup_test_environment, \
+    teardown_test_environment
+from django.urls import URLPattern, reverse
+from leagues import urls
+from leagues.instrumentation import query_fingerprint
+from leagues.synthetic_league import build_league
+
+# Maximum number of queries and median render time in milliseconds of each
+# page and AJAX request, see AJAX_REQUESTS. Query budgets must hold at every
+# scale, a page whose query count grows with the size of the league loads
+# related rows one by one. Lower the budget when a page gets cheaper, so that
+# the improvement can't silently regress
+BUDGETS = {
+    'index': (7, 250),
+    'login': (0, 100),
+    'signup': (0, 100),
+    'genre_detail': (9, 250),
+    'player_detail': (13, 500),
+    'team_detail': (31, 500),
+    'clan_detail': (19, 400),
+    'game_detail': (11, 400),
+    'match_detail': (10, 400),
+    'games': (7, 250),
+    'social': (11, 800),
+    'settings': (4, 200),
+    'stats': (4, 250),
+    'tournaments': (10, 500),
+    'tournament_detail': (14, 400),
+    'game_mode_detail': (9, 250),
+    'settings?panel=Games': (7, 150),
+    'settings?panel=Players': (5, 250),
+    'settings?panel=Teams': (5, 200),
+    'settings?panel=Clans': (5, 250),
+    'settings?panel=Tournaments': (8, 300),
+    'games?list=games': (4, 50),
+    'social?list=players': (6, 100),
+    'social?list=teams': (6, 100),
+    'social?list=clans': (6, 100),
+    'tournaments?list=tournaments': (5, 50),
+    'tournaments?list=matches': (4, 100),
+    'game_detail?list=players': (4, 100),
+    'settings?list=game': (5, 50),
+    'settings?list=genre': (5, 50),
+    'settings?list=gamemode': (5, 50),
+    'settings?list=player': (5, 100),
+    'settings?list=team': (5, 100),
+    'settings?list=clan': (5, 100),
+    'settings?list=tournament': (6, 50),
+    'settings?list=sponsor': (5, 50),
+    'settings?list=sponsorship': (5, 50),
+    'match_detail?after': (6, 250),
+}
+
+# Pages rendered without logged in user, other pages are rendered for a staff
+# user leading the first team of the league
+ANONYMOUS = {'login', 'signup'}
+
+# Pages with side effects
+SKIPPED = {'logout'}
+
+# AJAX requests made by pages after they load, measured like pages: panels of
+# the settings page, pages of keyset paginated lists returned as JSON and polls
+# of match events. Maps request name to (URL name, GET parameters)
+SETTINGS_PANELS = ['Games', 'Players', 'Teams', 'Clans', 'Tournaments']
+KEYSET_LISTS = {
+    'games': ['games'],
+    'social': ['players', 'teams', 'clans'],
+    'tournaments': ['tournaments', 'matches'],
+    'game_detail': ['players'],
+    'settings': ['game', 'genre', 'gamemode', 'player', 'team', 'clan', 'tournament', 'sponsor', 'sponsorship'],
+}
+AJAX_REQUESTS = {
+    **{'settings?panel=' + panel: ('settings', {'panel': panel}) for panel in SETTINGS_PANELS},
+    **{'{0}?list={1}'.format(name, key): (name, {'list': key}) for name, keys in KEYSET_LISTS.items() for key in keys},
+    # Poll from the beginning of the match returns all its deaths
+    'match_detail?after': ('match_detail', {'after': '0'}),
+}
+
+
+def url_arguments(league):
+    return {
+        'genre_detail': {'slug': league.genre.slug},
+        'player_detail': {'slug': league.player.slug},
+        'team_detail': {'slug': league.team.slug},
+        'clan_detail': {'slug': league.clan.slug},
+        'game_detail': {'slug': league.game.slug},
+        'match_detail': {'pk': league.match.pk},
+        'tournament_detail': {'slug': league.tournament.slug},
+        'game_mode_detail': {'slug': league.game_mode.slug},
+    }
+
+
+class Command(BaseCommand):
+    help = ('Builds synthetic leagues of growing size in a test database, renders every page of the leagues '
+            'application and checks numbers of queries and render times against their budgets')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[10, 100, 1000, 10000],
+                            help='Numbers of teams of the built leagues')
+        parser.add_argument('--matches-per-team', type=int, default=2, help='Matches played by each team')
+        parser.add_argument('--repeat', type=int, default=3, help='Renders of each page, median time is used')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database afterwards')
+
+    def handle(self, *args, **options):
+        patterns = [pattern for pattern in urls.urlpatterns
+                    if isinstance(pattern, URLPattern) and pattern.name and pattern.name not in SKIPPED]
+        # Request name, URL name, GET parameters and whether it's an AJAX request
+        requests = [(pattern.name, pattern.name, None, False) for pattern in patterns]
+        requests += [(name, url_name, params, True) for name, (url_name, params) in AJAX_REQUESTS.items()]
+        missing = [name for name, _, _, _ in requests if name not in BUDGETS]
+        if missing:
+            raise CommandError('Requests without budget: {0}'.format(', '.join(missing)))
+
+        # Benchmark requests don't belong to the request statistics of the site
+        with override_settings(REQUEST_STATS=False):
+            results = self.build_and_measure(requests, options)
+
+        failures = self.report(requests, results)
+        if failures:
+            raise CommandError('{0} requests over budget:\n{1}'.format(len(failures), '\n'.join(failures)))
+        self.stdout.write(self.style.SUCCESS('All pages within budget'))
+
+    def build_and_measure(self, requests, options):
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            results = {}
+            for scale in options['scales']:
+                self.stdout.write('Building league with {0} teams'.format(scale))
+                call_command('flush', interactive=False, verbosity=0)
+                cache.clear()
+                league = build_league(scale, matches_per_team=options['matches_per_team'], seed=options['seed'])
+                results[scale] = self.measure(requests, league, options['repeat'])
+        finally:
+            teardown_databases(databases, verbosity=0, keepdb=options['keepdb'])
+            teardown_test_environment()
+        return results
+
+    # Returns dictionary {request name: (status, number of queries, median time, repeated queries)}
+    def measure(self, requests, league, repeat):
+        user = league.player.user
+        User.objects.filter(pk=user.pk).update(is_staff=True)
+        anonymous = Client()
+        staff = Client()
+        staff.force_login(user)
+
+        arguments = url_arguments(league)
+        results = {}
+        for name, url_name, params, ajax in requests:
+            client = anonymous if url_name in ANONYMOUS else staff
+            path = reverse('{0}:{1}'.format(urls.app_name, url_name), kwargs=arguments.get(url_name))
+            headers = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'} if ajax else {}
+            times = []
+            for _ in range(repeat):
+                # Cached fragments would hide queries of repeated renders
+                cache.clear()
+                reset_queries()
+                with ExitStack() as stack:
+                    # Reads may be routed to replicas, see leagues.db_routing
+                    captures = [stack.enter_context(CaptureQueriesContext(connection))
+                                for connection in connections.all()]
+                    start = time.perf_counter()
+                    response = client.get(path, params, **headers)
+                    times.append((time.perf_counter() - start) * 1000)
+            queries = [query for capture in captures for query in capture.captured_queries]
+            repeated = Counter(query_fingerprint(query['sql']) for query in queries)
+            results[name] = (response.status_code, len(queries), statistics.median(times),
+                             [(count, sql) for sql, count in repeated.most_common(3) if count > 1])
+        return results
+
+    def report(self, requests, results):
+        scales = list(results)
+        self.stdout.write('{0:<28}'.format('Request') + ''.join('{0:>18}'.format('{0} teams'.format(scale))
+                                                                for scale in scales))
+        failures = []
+        for name, _, _, _ in requests:
+            query_budget, time_budget = BUDGETS[name]
+            cells = []
+            for scale in scales:
+                status, queries, elapsed, repeated = results[scale][name]
+                cells.append('{0:>18}'.format('{0}q {1:.0f}ms'.format(queries, elapsed)))
+                if status >= 400:
+                    failures.append('{0} at {1} teams: status {2}'.format(name, scale, status))
+                if queries > query_budget:
+                    failures.append('{0} at {1} teams: {2} queries, budget {3}{4}'.format(
+                        name, scale, queries, query_budget,
+                        ''.join('\n    {0}x {1}'.format(count, sql[:200]) for count, sql in repeated)))
+                if elapsed > time_budget:
+                    failures.append('{0} at {1} teams: {2:.0f} ms, budget {3} ms'.format(
+                        name, scale, elapsed, time_budget))
+            self.stdout.write('{0:<28}'.format(name) + ''.join(cells))
+        return failures
@@ -0,0 +1,120 @@
+import statistics
+import time
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count, Q
+from django.test.utils import setup_databases, teardown_databases, setup_test_environment, \
+    teardown_test_environment
+from django.utils import timezone
+from leagues.models import Tournament, Player, Match, PlayedMatch, Death, Assist
+from leagues.pagination import KeysetPaginator
+from leagues.synthetic_league import build_league
+
+
+# Querysets of the access paths served by the indexes, named by the page or
+# method issuing them
+def hot_queries(league):
+    match = league.match
+    player = league.player
+    today = timezone.now().date()
+    return {
+        'player deaths in match': Death.objects.filter(match=match, victim=player).values('pk'),
+        'player kills in match': Death.objects.filter(match=match, killer=player).values('pk'),
+        'player assists in match': Assist.objects.filter(death__match=match, player=player).values('pk'),
+        'player win ratio': grouped(PlayedMatch.objects.filter(player=player), 'player'),
+        'players list': Player.objects.with_match_stats().order_by('nickname').values('pk', 'win_percentage')[:50],
+        'team member stats': grouped(PlayedMatch.objects.filter(team=league.team), 'player'),
+        'clan member stats': grouped(PlayedMatch.objects.filter(clan=league.clan), 'player'),
+        'tournament wins of team': Match.objects.filter(tournament=league.tournament, winner=league.team)
+                                               .values('pk'),
+        'running tournaments': Tournament.objects.filter(opening_date__lte=today, end_date__gte=today)
+                                                 .values('pk'),
+    }
+
+
+def grouped(played, group_by):
+    return played.order_by().values(group_by).annotate(total=Count('pk'), won=Count('pk', filter=Q(won=True)))
+
+
+# First and middle page of the list of all matches, see TournamentView
+def match_list_queries(league):
+    ordering = ['-beginning', '-id']
+    matches = Match.objects.order_by(*ordering)
+    middle = matches[matches.count() // 2]
+    seek = KeysetPaginator.seek_filter(ordering, [middle.beginning, middle.id], False)
+    return {
+        'first page of matches': matches.values('pk')[:51],
+        'middle page of matches': matches.filter(seek).values('pk')[:51],
+    }
+
+
+# Migrations adding indexes, each with the migration before it and the queries
+# served by its indexes, in the order of migrations
+INDEX_MIGRATIONS = [
+    ('0050_query_pattern_indexes', '0049_played_match_stats', hot_queries),
+    ('0052_match_beginning_index', '0051_match_game_beginning_index', match_list_queries),
+]
+
+
+class Command(BaseCommand):
+    help = ('Builds a synthetic league in a test database and shows query plans and times of hot queries '
+            'without and with the indexes tuned to them')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=1000, help='Number of teams of the built league')
+        parser.add_argument('--matches-per-team', type=int, default=4, help='Matches played by each team')
+        parser.add_argument('--repeat', type=int, default=20, help='Runs of each query, median time is used')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        databases = setup_databases(verbosity=0, interactive=False)
+        try:
+            self.stdout.write('Building league with {0} teams'.format(options['teams']))
+            cache.clear()
+            league = build_league(options['teams'], matches_per_team=options['matches_per_team'],
+                                  seed=options['seed'])
+            results = []
+            for migration, previous, queries in INDEX_MIGRATIONS:
+                queries = queries(league)
+                call_command('migrate', 'leagues', previous, verbosity=0)
+                before = self.measure(queries, options['repeat'])
+                call_command('migrate', 'leagues', migration, verbosity=0)
+                after = self.measure(queries, options['repeat'])
+                results.append((migration, before, after))
+        finally:
+            teardown_databases(databases, verbosity=0)
+            teardown_test_environment()
+
+        for migration, before, after in results:
+            self.stdout.write(self.style.SUCCESS('Migration {0}'.format(migration)))
+            for name in before:
+                (plan_before, time_before), (plan_after, time_after) = before[name], after[name]
+                self.stdout.write(self.style.MIGRATE_HEADING(
+                    '{0}: {1:.3f} ms -> {2:.3f} ms'.format(name, time_before, time_after)))
+                self.stdout.write('  without indexes:')
+                self.stdout.write(indent(plan_before))
+                self.stdout.write('  with indexes:')
+                self.stdout.write(indent(plan_after))
+
+    # Returns dictionary {name: (query plan, median time in milliseconds)}
+    def measure(self, queries, repeat):
+        # Planner statistics of the current set of indexes
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        results = {}
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            times = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                list(queryset.all())
+                times.append((time.perf_counter() - start) * 1000)
+            results[name] = (plan, statistics.median(times))
+        return results
+
+
+def indent(plan):
+    return '\n'.join('    ' + line for line in plan.splitlines())
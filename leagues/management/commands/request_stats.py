@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from leagues.instrumentation import read_records, summarize
+
+
+class Command(BaseCommand):
+    help = 'Prints per view summary of request statistics collected by RequestStatsMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None, help='Log file, REQUEST_STATS_FILE by default')
+        parser.add_argument('--sort', default='latency_p95',
+                            choices=('latency_p95', 'latency_avg', 'queries_avg', 'queries_max',
+                                     'template_time_avg', 'requests', 'view'),
+                            help='Column to sort views by')
+        parser.add_argument('--duplicates', action='store_true', help='Show repeated queries of each view')
+
+    def handle(self, *args, **options):
+        records = read_records(options['file'])
+        if not records:
+            self.stdout.write('No requests recorded')
+            return
+
+        row = '{0:<40} {1:>8} {2:>10} {3:>10} {4:>8} {5:>8} {6:>10}'
+        self.stdout.write(row.format('View', 'Requests', 'Avg ms', 'p95 ms', 'Queries', 'Max', 'Render ms'))
+        for view in summarize(records, options['sort']):
+            self.stdout.write(row.format(view['view'], view['requests'], view['latency_avg'], view['latency_p95'],
+                                         view['queries_avg'], view['queries_max'], view['template_time_avg']))
+            if options['duplicates']:
+                for duplicate in view['duplicates']:
+                    self.stdout.write('    {0}x {1}'.format(duplicate['count'], duplicate['sql'][:200]))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from leagues.synthetic_league import LeagueSeeder
+
+
+class Command(BaseCommand):
+    help = ('Generates synthetic league with genres, games, players, clans, teams, tournaments, sponsorships '
+            'and full match histories')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--genres', type=int, default=5, help='Number of genres')
+        parser.add_argument('--games', type=int, default=12, help='Number of games')
+        parser.add_argument('--sponsors', type=int, default=30, help='Number of sponsors')
+        parser.add_argument('--clans', type=int, default=100, help='Number of clans')
+        parser.add_argument('--players', type=int, default=3000, help='Number of players, each with a user')
+        parser.add_argument('--teams', type=int, default=400, help='Number of teams')
+        parser.add_argument('--tournaments', type=int, default=60, help='Number of tournaments')
+        parser.add_argument('--teams-per-tournament', type=int, default=16,
+                            help='Maximum number of teams registered for a tournament')
+        parser.add_argument('--matches', type=int, default=2000, help='Number of matches')
+        parser.add_argument('--pendings', type=int, default=300, help='Number of pending clan and team requests')
+        parser.add_argument('--history-days', type=int, default=365, help='Length of the match history in days')
+        parser.add_argument('--prefix', default='Synthetic', help='Prefix of names of generated objects')
+        parser.add_argument('--seed', type=int, default=None, help='Seed of the random generator')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Number of processes generating match events')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of matches whose events are inserted in one transaction')
+
+    def handle(self, *args, **options):
+        if options['clans'] < 1 or options['games'] < 1 or options['genres'] < 1 or options['sponsors'] < 1:
+            raise CommandError('League needs at least one genre, game, sponsor and clan')
+        if options['players'] < options['clans']:
+            raise CommandError('Every clan needs at least one player')
+
+        seeder = LeagueSeeder(prefix=options['prefix'], seed=options['seed'], workers=options['workers'],
+                              batch_size=options['batch_size'], history_days=options['history_days'],
+                              log=self.stdout.write)
+        if seeder.exists():
+            raise CommandError('League with prefix "{0}" already exists, use --prefix'.format(options['prefix']))
+
+        deaths = seeder.build(genres=options['genres'], games=options['games'], sponsors=options['sponsors'],
+                              clans=options['clans'], players=options['players'], teams=options['teams'],
+                              tournaments=options['tournaments'],
+                              teams_per_tournament=options['teams_per_tournament'], matches=options['matches'],
+                              pendings=options['pendings'])
+        self.stdout.write(self.style.SUCCESS('Generated league "{0}" with {1} matches and {2} deaths'.format(
+            options['prefix'], len(seeder.matches), deaths)))
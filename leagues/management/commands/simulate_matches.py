@@ -0,0 +1,69 @@
+import datetime
+import random
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from leagues.models import Tournament, Match
+from leagues.match_simulation import random_duration, save_simulated_matches, event_generator
+
+
+class Command(BaseCommand):
+    help = 'Simulates given number of matches between teams registered for a tournament'
+
+    def add_arguments(self, parser):
+        parser.add_argument('tournament', help='Slug of the tournament')
+        parser.add_argument('count', type=int, help='Number of matches to simulate')
+        parser.add_argument('--seed', type=int, default=None, help='Seed of the random generator')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of matches saved in one transaction')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        generator = event_generator(options['seed'])
+        try:
+            tournament = Tournament.objects.select_related('game_mode').get(slug=options['tournament'])
+        except Tournament.DoesNotExist:
+            raise CommandError('Tournament "{0}" does not exist'.format(options['tournament']))
+        if tournament.upcoming:
+            raise CommandError('Tournament "{0}" has not started yet'.format(tournament))
+
+        # Only teams with enough members can play in the tournament
+        count = tournament.game_mode.team_player_count
+        teams = []
+        for team in tournament.team_set.select_related('clan').prefetch_related('team_members'):
+            members = sorted(member.id for member in team.team_members.all())
+            if len(members) >= count:
+                teams.append((team, members))
+        if len(teams) < 2:
+            raise CommandError('Tournament needs at least 2 registered teams with {0} players'.format(count))
+
+        # Matches are spread over the part of the tournament which already happened
+        first = timezone.make_aware(datetime.datetime.combine(tournament.opening_date, datetime.time()))
+        last = min(timezone.now(), timezone.make_aware(
+            datetime.datetime.combine(tournament.end_date, datetime.time.max)))
+        window = max(0, int((last - first).total_seconds()))
+
+        simulations = []
+        created = 0
+        for _ in range(options['count']):
+            (team_1, members_1), (team_2, members_2) = rng.sample(teams, 2)
+            players_1 = rng.sample(members_1, count)
+            available = [member for member in members_2 if member not in players_1]
+            if len(available) < count:
+                # Teams share too many players to play against each other
+                continue
+            players_2 = rng.sample(available, count)
+
+            duration = random_duration(rng)
+            beginning = first + datetime.timedelta(seconds=rng.randint(0, window))
+            beginning = min(beginning, last - duration)
+            match = Match(tournament=tournament, game=tournament.game, game_mode=tournament.game_mode,
+                          team_1=team_1, team_2=team_2, winner=rng.choice((team_1, team_2)),
+                          beginning=beginning, duration=duration)
+            simulations.append((match, players_1, players_2))
+            if len(simulations) >= options['batch_size']:
+                created += len(save_simulated_matches(simulations, generator))
+                simulations = []
+
+        if simulations:
+            created += len(save_simulated_matches(simulations, generator))
+        self.stdout.write(self.style.SUCCESS('Simulated {0} matches of tournament "{1}"'.format(created, tournament)))
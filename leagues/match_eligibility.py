@@ -0,0 +1,45 @@
+from django.db.models import F, Q, OuterRef, Exists
+from leagues.models import Team, Player, count_subquery
+
+# Candidate teams of the match creation wizard. Member counts, overlap of
+# lineups and playing status are computed in the database for all candidate
+# teams at once, so each step runs a fixed number of queries
+
+TeamMembership = Player.teams.through
+
+
+def member_count():
+    return count_subquery(TeamMembership.objects.filter(team=OuterRef('pk')))
+
+
+def available_teams(queryset):
+    # Teams which aren't playing another match at the moment
+    return queryset.with_playing_status().filter(playing=False)
+
+
+def tournament_candidates(tournament):
+    return available_teams(tournament.team_set.all())
+
+
+# Active teams of the game which given player is member of
+# and which have enough players for the game mode
+def team_1_candidates(game_id, team_player_count, player_id):
+    member = TeamMembership.objects.filter(team=OuterRef('pk'), player_id=player_id)
+    queryset = Team.objects.filter(Exists(member), game_id=game_id, active=True)
+    queryset = queryset.annotate(member_count=member_count()).filter(member_count__gte=team_player_count)
+    return available_teams(queryset)
+
+
+# Active teams of the game from other clans which can play against given team.
+# Players of both teams are distinct in a match, so the opponent must have
+# enough players and both teams together at least two full lineups
+def team_2_candidates(team, game_id, team_player_count):
+    team_members = TeamMembership.objects.filter(team=team).values('player_id')
+    shared = TeamMembership.objects.filter(team=OuterRef('pk'), player_id__in=team_members)
+    team_size = team.team_members.count()
+    queryset = Team.objects.filter(Q(game_id=game_id) & Q(active=True) & ~Q(clan=team.clan))
+    queryset = queryset.annotate(member_count=member_count(), shared_count=count_subquery(shared))
+    queryset = queryset.annotate(exclusive_count=F('member_count') - F('shared_count'))
+    queryset = queryset.filter(member_count__gte=team_player_count,
+                               exclusive_count__gte=2 * team_player_count - team_size)
+    return available_teams(queryset)
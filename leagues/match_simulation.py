@@ -0,0 +1,216 @@
+import random
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from django.db import transaction
+from leagues.models import PlayedMatch, Death, Assist, PlayerGameStats
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def random_duration(rng=random):
+    return timedelta(minutes=rng.randint(20, 59), seconds=rng.randint(0, 59))
+
+
+ASSIST_TYPES = ['HEALING', 'DAMAGE']
+
+# Events of one or more matches produced by NumPyEventGenerator. All attributes
+# are arrays with one item per event, events are ordered by match and time.
+# Assists and assist_types have one column per possible assisting player,
+# unused columns of assists are filled with -1
+Timeline = namedtuple('Timeline', ['match_index', 'times', 'victims', 'killers', 'assists', 'assist_types'])
+
+
+def max_assists(team_player_count):
+    # Killer and victim can't assist, so the assisting players are
+    # at most the rest of the killer's team except one player
+    return max(0, team_player_count - 2)
+
+
+# Generates random deaths and assists of matches in memory. Produced events
+# are tuples (death, assists) where assists are (player_id, type) pairs because
+# death doesn't have its primary key until it is saved
+class EventGenerator:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def match_events(self, match, players_1, players_2):
+        rng = self.rng
+        players_1 = list(players_1)
+        players_2 = list(players_2)
+        duration = match.duration_seconds
+        event_interval = max(15, duration // (30 + 1))
+        assist_limit = max_assists(match.game_mode.team_player_count)
+        events = []
+        event_time = 0
+        while 1:
+            event_time += rng.randint(15, event_interval)
+            if event_time >= duration:
+                break
+            num_of_assists = rng.randint(0, assist_limit)
+            if rng.randint(1, 2) == 1:
+                victim = rng.choice(players_1)
+                killers = players_2
+            else:
+                victim = rng.choice(players_2)
+                killers = players_1
+
+            killer = rng.choice(killers)
+            possible_assists = [player for player in killers if player != killer]
+            assists = [(player, rng.choice(ASSIST_TYPES))
+                       for player in rng.sample(possible_assists, min(num_of_assists, len(possible_assists)))]
+            death = Death(match=match, victim_id=victim, killer_id=killer, match_time=timedelta(seconds=event_time))
+            events.append((death, assists))
+        return events
+
+    def events(self, simulations):
+        events = []
+        for match, players_1, players_2 in simulations:
+            events.extend(self.match_events(match, players_1, players_2))
+        return events
+
+
+# Vectorized version of EventGenerator which generates timelines of whole
+# batches of matches at once. Requires NumPy
+class NumPyEventGenerator(EventGenerator):
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        self.np_rng = numpy.random.default_rng(seed)
+
+    def timeline(self, durations, lineups_1, lineups_2):
+        # Durations are in seconds, lineups are matrices with one row of
+        # player IDs per match and one column per player of the team
+        rng = self.np_rng
+        durations = numpy.asarray(durations, dtype=numpy.int64)
+        lineups_1 = numpy.asarray(lineups_1, dtype=numpy.int64).reshape(len(durations), -1)
+        lineups_2 = numpy.asarray(lineups_2, dtype=numpy.int64).reshape(len(durations), -1)
+        count = lineups_1.shape[1]
+
+        # Every step takes at least 15 seconds, so this many steps always reaches the end of match
+        intervals = numpy.maximum(15, durations // (30 + 1))
+        max_events = int(durations.max(initial=0)) // 15 + 1
+        steps = rng.integers(15, intervals[:, None], size=(len(durations), max_events), endpoint=True)
+        times = numpy.cumsum(steps, axis=1)
+        happened = times < durations[:, None]
+        match_index = numpy.nonzero(happened)[0]
+        times = times[happened]
+        events = numpy.arange(len(times))
+
+        # Pick side of the victim, killer is always from the opposing team
+        team_1_died = rng.integers(0, 2, size=len(times)).astype(bool)[:, None]
+        victim_lineups = numpy.where(team_1_died, lineups_1[match_index], lineups_2[match_index])
+        killer_lineups = numpy.where(team_1_died, lineups_2[match_index], lineups_1[match_index])
+        victims = victim_lineups[events, rng.integers(0, count, size=len(times))]
+        killer_index = rng.integers(0, count, size=len(times))
+        killers = killer_lineups[events, killer_index]
+
+        # Random permutation of killer's teammates with the killer moved to the end
+        keys = rng.random((len(times), count))
+        keys[events, killer_index] = 2.0
+        order = numpy.argsort(keys, axis=1)[:, :count - 1]
+        assists = numpy.take_along_axis(killer_lineups, order, axis=1)
+        num_of_assists = rng.integers(0, max_assists(count), size=len(times), endpoint=True)
+        assists[numpy.arange(count - 1)[None, :] >= num_of_assists[:, None]] = -1
+        assist_types = rng.integers(0, len(ASSIST_TYPES), size=assists.shape)
+        return Timeline(match_index, times, victims, killers, assists, assist_types)
+
+    # Yields tuples (simulations, timeline), lineups of a timeline must have
+    # the same size, so matches are grouped by game mode player count
+    def timelines(self, simulations):
+        groups = defaultdict(list)
+        for simulation in simulations:
+            groups[len(simulation[1])].append(simulation)
+
+        for group in groups.values():
+            yield group, self.timeline([match.duration_seconds for match, _, _ in group],
+                                       [list(players_1) for _, players_1, _ in group],
+                                       [list(players_2) for _, _, players_2 in group])
+
+    def events(self, simulations):
+        events = []
+        for group, timeline in self.timelines(simulations):
+            rows = zip(timeline.match_index.tolist(), timeline.times.tolist(), timeline.victims.tolist(),
+                       timeline.killers.tolist(), timeline.assists.tolist(), timeline.assist_types.tolist())
+            for index, time, victim, killer, assists, assist_types in rows:
+                death = Death(match=group[index][0], victim_id=victim, killer_id=killer,
+                              match_time=timedelta(seconds=time))
+                assists = [(player, ASSIST_TYPES[assist_type])
+                           for player, assist_type in zip(assists, assist_types) if player != -1]
+                events.append((death, assists))
+        return events
+
+
+def event_generator(seed=None):
+    if numpy is None:
+        return EventGenerator(seed)
+    return NumPyEventGenerator(seed)
+
+
+# Sets kills, deaths and assists of unsaved played matches from generated events
+def count_played_match_events(played, events):
+    records = {(record.match.id, record.player_id): record for record in played}
+    for death, assists in events:
+        records[(death.match_id, death.victim_id)].deaths += 1
+        if death.killer_id:
+            records[(death.match_id, death.killer_id)].kills += 1
+        for player, _ in assists:
+            records[(death.match_id, player)].assists += 1
+
+
+def update_player_game_stats(played, events, games):
+    counters = defaultdict(lambda: defaultdict(int))
+    for record in played:
+        stats = counters[(record.player_id, games[record.match_id])]
+        stats['matches_played'] += 1
+        stats['matches_won'] += int(record.won)
+    for death, assists in events:
+        game_id = games[death.match_id]
+        counters[(death.victim_id, game_id)]['deaths'] += 1
+        if death.killer_id:
+            counters[(death.killer_id, game_id)]['kills'] += 1
+        for player, _ in assists:
+            counters[(player, game_id)]['assists'] += 1
+    PlayerGameStats.increment_many(counters)
+
+
+# Saves simulated matches together with played matches, deaths and assists.
+# Each item of simulations is tuple (match, players_1, players_2) where match is
+# unsaved Match instance and players are IDs of players in each lineup.
+# All rows are written with bulk inserts inside single transaction.
+def save_simulated_matches(simulations, generator=None):
+    generator = generator or event_generator()
+    with transaction.atomic():
+        played = []
+        for match, players_1, players_2 in simulations:
+            match.save()
+            for team, players in ((match.team_1, players_1), (match.team_2, players_2)):
+                played.extend(PlayedMatch(player_id=player, match=match, team=team, clan=team.clan,
+                                          won=team.id == match.winner_id)
+                              for player in players)
+
+        events = generator.events(simulations)
+        count_played_match_events(played, events)
+        PlayedMatch.objects.bulk_create(played)
+        deaths = [death for death, _ in events]
+        Death.objects.bulk_create(deaths)
+        if deaths and deaths[0].pk is None:
+            # Backend doesn't return primary keys of bulk inserted rows, matches
+            # are new so their deaths are exactly the rows we have just inserted
+            match_ids = [match.id for match, _, _ in simulations]
+            ids = Death.objects.filter(match_id__in=match_ids).order_by('id').values_list('id', flat=True)
+            for death, pk in zip(deaths, ids):
+                death.pk = pk
+
+        assists = [Assist(death=death, player_id=player, type=assist_type)
+                   for death, death_assists in events for player, assist_type in death_assists]
+        Assist.objects.bulk_create(assists)
+
+        games = {match.id: match.game_id for match, _, _ in simulations}
+        update_player_game_stats(played, events, games)
+    return [match for match, _, _ in simulations]
+
+
+def save_simulated_match(match, players_1, players_2, generator=None):
+    return save_simulated_matches([(match, players_1, players_2)], generator)[0]
@@ -0,0 +1,65 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:27
+
+from django.db import migrations, models
+from django.db.models import Count, F
+import django.db.models.deletion
+
+
+def fill_player_game_stats(apps, schema_editor):
+    PlayerGameStats = apps.get_model('leagues', 'PlayerGameStats')
+    PlayedMatch = apps.get_model('leagues', 'PlayedMatch')
+    Death = apps.get_model('leagues', 'Death')
+    Assist = apps.get_model('leagues', 'Assist')
+
+    stats = {}
+
+    def counters(player_id, game_id):
+        key = (player_id, game_id)
+        if key not in stats:
+            stats[key] = PlayerGameStats(player_id=player_id, game_id=game_id)
+        return stats[key]
+
+    played = PlayedMatch.objects.filter(match__game__isnull=False)
+    for row in played.values('player_id', 'match__game_id').annotate(total=Count('id')):
+        counters(row['player_id'], row['match__game_id']).matches_played = row['total']
+    for row in played.filter(team=F('match__winner')).values('player_id', 'match__game_id').annotate(total=Count('id')):
+        counters(row['player_id'], row['match__game_id']).matches_won = row['total']
+
+    deaths = Death.objects.filter(match__game__isnull=False)
+    for row in deaths.values('victim_id', 'match__game_id').annotate(total=Count('id')):
+        counters(row['victim_id'], row['match__game_id']).deaths = row['total']
+    for row in deaths.filter(killer__isnull=False).values('killer_id', 'match__game_id').annotate(total=Count('id')):
+        counters(row['killer_id'], row['match__game_id']).kills = row['total']
+
+    assists = Assist.objects.filter(death__match__game__isnull=False)
+    for row in assists.values('player_id', 'death__match__game_id').annotate(total=Count('id')):
+        counters(row['player_id'], row['death__match__game_id']).assists = row['total']
+
+    PlayerGameStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0044_remove_player_games'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerGameStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kills', models.PositiveIntegerField(default=0)),
+                ('deaths', models.PositiveIntegerField(default=0)),
+                ('assists', models.PositiveIntegerField(default=0)),
+                ('matches_played', models.PositiveIntegerField(default=0)),
+                ('matches_won', models.PositiveIntegerField(default=0)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='player_stats', to='leagues.game')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='game_stats', to='leagues.player')),
+            ],
+            options={
+                'unique_together': {('player', 'game')},
+            },
+        ),
+        migrations.RunPython(fill_player_game_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0045_playergamestats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_1', 'beginning'], name='match_team_1_beginning_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_2', 'beginning'], name='match_team_2_beginning_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['clan_1', 'beginning'], name='match_clan_1_beginning_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['clan_2', 'beginning'], name='match_clan_2_beginning_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:45
+
+from django.db import migrations, models
+
+
+def fill_match_ending(apps, schema_editor):
+    Match = apps.get_model('leagues', 'Match')
+    matches = []
+    for match in Match.objects.filter(duration__isnull=False).only('beginning', 'duration').iterator():
+        match.ending = match.beginning + match.duration
+        matches.append(match)
+    Match.objects.bulk_update(matches, ['ending'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0046_match_participation_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='ending',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='end of the match'),
+        ),
+        migrations.RunPython(fill_match_ending, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['ending'], name='match_ending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_1', 'ending'], name='match_team_1_ending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['team_2', 'ending'], name='match_team_2_ending_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-17 17:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0047_match_ending'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='death',
+            index=models.Index(fields=['match', 'match_time'], name='death_match_time_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:14
+
+from django.db import migrations, models
+from django.db.models import Exists, F, Func, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_played_match_stats(apps, schema_editor):
+    PlayedMatch = apps.get_model('leagues', 'PlayedMatch')
+    Match = apps.get_model('leagues', 'Match')
+    Death = apps.get_model('leagues', 'Death')
+    Assist = apps.get_model('leagues', 'Assist')
+
+    def count(queryset):
+        queryset = queryset.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count')
+        return Coalesce(Subquery(queryset, output_field=models.IntegerField()), 0)
+
+    PlayedMatch.objects.update(
+        won=Exists(Match.objects.filter(pk=OuterRef('match'), winner=OuterRef('team'))),
+        kills=count(Death.objects.filter(match=OuterRef('match'), killer=OuterRef('player'))),
+        deaths=count(Death.objects.filter(match=OuterRef('match'), victim=OuterRef('player'))),
+        assists=count(Assist.objects.filter(death__match=OuterRef('match'), player=OuterRef('player'))),
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0048_death_match_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playedmatch',
+            name='assists',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='playedmatch',
+            name='deaths',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='playedmatch',
+            name='kills',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='playedmatch',
+            name='won',
+            field=models.BooleanField(default=False, verbose_name='game won'),
+        ),
+        migrations.RunPython(fill_played_match_stats, migrations.RunPython.noop),
+    ]
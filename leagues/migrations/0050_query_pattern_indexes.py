@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0049_played_match_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assist',
+            index=models.Index(fields=['player', 'death'], name='assist_player_death_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='death',
+            index=models.Index(fields=['match', 'victim'], name='death_match_victim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='death',
+            index=models.Index(fields=['match', 'killer'], name='death_match_killer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'winner'], name='match_tournament_winner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playedmatch',
+            index=models.Index(fields=['player', 'won'], name='played_match_player_won_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playedmatch',
+            index=models.Index(fields=['team', 'player', 'won'], name='played_match_team_player_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playedmatch',
+            index=models.Index(fields=['clan', 'player', 'won'], name='played_match_clan_player_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['end_date', 'opening_date'], name='tournament_dates_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0050_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['game', 'beginning'], name='match_game_beginning_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-17 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0051_match_game_beginning_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['beginning', 'id'], name='match_beginning_idx'),
+        ),
+    ]
@@ -2,19 +2,74 @@ import datetime
 from django.db import models
 from django.utils import timezone
 from django.utils.text import slugify
+from django.utils.functional import cached_property
 from django.conf import settings
+from django.core.cache import cache
 from django.template.defaultfilters import slugify
 from django_countries.fields import CountryField
-from django.db.models import F, Q, Sum
+from django.db.models import F, Q, Count, Sum, Func, OuterRef, Subquery, ExpressionWrapper
+from django.db.models import Window, Exists, Case, When, Value, Prefetch
+from django.db.models.functions import Coalesce, NullIf, Rank
 from datetime import date
 from enum import Enum
 import re
+import uuid
 
 
 def strip_spaces(string):
     return re.sub(r'\s+', ' ', string)
 
 
+def count_subquery(queryset):
+    # Correlated COUNT(*) of given queryset, usable inside annotate()
+    queryset = queryset.order_by().annotate(count=Func(F('pk'), function='COUNT')).values('count')
+    return Coalesce(Subquery(queryset, output_field=models.IntegerField()), 0)
+
+
+def match_stats_annotations(matches, won):
+    # Annotations shared by with_match_stats() querysets of teams, clans and players
+    return {
+        'total_matches': count_subquery(matches),
+        'won_matches': count_subquery(won),
+    }
+
+
+def win_percentage():
+    return ExpressionWrapper(F('won_matches') * 100.0 / NullIf(F('total_matches'), 0),
+                             output_field=models.FloatField())
+
+
+def first_match_date(*matches):
+    # Local date of the earliest match in given querysets or None if there are no
+    # matches. Each queryset is read by one seek on an index ending with beginning,
+    # e.g. (team_1, beginning), unlike MIN over an OR of its filters
+    beginnings = [beginning for queryset in matches
+                  for beginning in queryset.order_by('beginning').values_list('beginning', flat=True)[:1]]
+    if not beginnings:
+        return None
+    beginning = min(beginnings)
+    return timezone.localtime(beginning).date() if timezone.is_aware(beginning) else beginning.date()
+
+
+def in_progress(matches):
+    # Matches of given queryset running at the moment, see Match.in_progress
+    now = timezone.now()
+    return matches.filter(ending__gte=now, beginning__lte=now)
+
+
+def grouped_match_stats(matches, group_by, won):
+    # Numbers of matches and won matches grouped by given field computed
+    # with single GROUP BY query, returns dictionary {value: (total, won)}
+    rows = matches.order_by().values(group_by).annotate(total=Count('pk'), won=Count('pk', filter=won))
+    return {row[group_by]: (row['total'], row['won']) for row in rows}
+
+
+def format_win_ratio(won, total, separator=' '):
+    if not total:
+        return None
+    return str(round((won / total) * 100, 2)) + separator + "%"
+
+
 class Genre(models.Model):
     name = models.CharField(max_length=100, unique=True, help_text="Name of the genre of a game")
     slug = models.SlugField(max_length=100, unique=True)
@@ -64,6 +119,10 @@ class Game(models.Model):
     def players(self):
         return Player.objects.filter(playedmatch__match__game=self)
 
+    @property
+    def first_match_date(self):
+        return first_match_date(self.match_set.all())
+
     def as_array(self):
         return [self.id, self.name]
 
@@ -111,6 +170,110 @@ TournamentStatusString = {
 }
 
 
+@template_enum
+class MembershipStatus(Enum):
+    PENDING = 2
+    MEMBER = 1
+    NOT_MEMBER = 0
+
+
+TOURNAMENT_CACHE_VERSION_KEY = 'leagues:tournament_version'
+
+
+# Values derived from tournament sponsorships are cached under keys containing
+# current cache version. Changing the version invalidates all of them at once.
+# Versions and values expire after TIMEOUT of the cache backend, which bounds
+# staleness when each worker process has its own cache, see CACHES in settings
+def tournament_cache_version():
+    version = cache.get(TOURNAMENT_CACHE_VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(TOURNAMENT_CACHE_VERSION_KEY, version)
+    return version
+
+
+def invalidate_tournament_cache():
+    cache.set(TOURNAMENT_CACHE_VERSION_KEY, uuid.uuid4().hex)
+
+
+def tournament_cache_key(version, tournament_id):
+    return 'leagues:tournament:{0}:{1}'.format(version, tournament_id)
+
+
+# Version of cached data rendered from rows of given model, changed whenever
+# any row of the model is saved or deleted
+def model_cache_version(model):
+    key = 'leagues:model_version:' + model._meta.label_lower
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.set(key, version)
+    return version
+
+
+def invalidate_model_cache(model):
+    cache.set('leagues:model_version:' + model._meta.label_lower, uuid.uuid4().hex)
+
+
+# Returns tuple (prize, main sponsor) of given tournament, on cache miss only
+# this tournament is loaded
+def tournament_sponsorship(tournament_id):
+    summary = cache.get(tournament_cache_key(tournament_cache_version(), tournament_id))
+    if summary is not None:
+        return summary
+    return load_tournament_sponsorships([tournament_id]).get(tournament_id, (0, None))
+
+
+# Makes sure prize and main sponsor of given tournaments are cached. Lists call
+# it for each page, on any miss values of all tournaments are loaded with a
+# single query, so that following pages are served from the cache
+def cache_tournament_sponsorships(tournaments):
+    version = tournament_cache_version()
+    keys = [tournament_cache_key(version, tournament.id) for tournament in tournaments]
+    if len(cache.get_many(keys)) < len(keys):
+        load_tournament_sponsorships()
+
+
+# Loads and caches tuples (prize, main sponsor) of given tournaments, of all
+# tournaments when no IDs are given. Returns dictionary {tournament ID: tuple}
+def load_tournament_sponsorships(tournament_ids=None):
+    version = tournament_cache_version()
+    tournaments = Tournament.objects.all()
+    if tournament_ids is not None:
+        tournaments = tournaments.filter(pk__in=tournament_ids)
+    # ID and name of the main sponsor come from the same sponsorship row
+    main = Sponsorship.objects.filter(tournament=OuterRef('pk'), type='MAIN').order_by('pk')[:1]
+    rows = tournaments.annotate(
+        prize_sum=Sum('sponsorship__amount'),
+        main_sponsor_id=Subquery(main.values('sponsor_id')),
+        main_sponsor_name=Subquery(main.values('sponsor__name')),
+    ).values_list('id', 'prize_sum', 'main_sponsor_id', 'main_sponsor_name')
+
+    summaries = {}
+    for pk, prize, sponsor_id, sponsor_name in rows:
+        sponsor = Sponsor(id=sponsor_id, name=sponsor_name) if sponsor_id else None
+        summaries[pk] = (prize or 0, sponsor)
+    cache.set_many({tournament_cache_key(version, pk): value for pk, value in summaries.items()})
+    return summaries
+
+
+class TournamentQuerySet(models.QuerySet):
+    # Annotates number of registered teams and whether given player leads any of them
+    def with_registration(self, player):
+        registered = RegisteredTeams.objects.filter(tournament=OuterRef('pk'))
+        return self.annotate(
+            registered_count=count_subquery(registered),
+            leads_registered=Exists(registered.filter(team__leader=player)),
+        )
+
+    # Running tournaments in which given player can create a match, i.e. at
+    # least two teams are registered and the player leads one of them
+    def open_for_matches(self, player):
+        today = timezone.now().date()
+        queryset = self.filter(opening_date__lte=today, end_date__gte=today).with_registration(player)
+        return queryset.filter(registered_count__gte=2, leads_registered=True)
+
+
 class Tournament(models.Model):
     name = models.CharField('tournament name', max_length=200, unique=True)
     slug = models.SlugField(max_length=200, unique=True)
@@ -121,10 +284,18 @@ class Tournament(models.Model):
     game = models.ForeignKey(Game, on_delete=models.PROTECT)
     game_mode = models.ForeignKey(GameMode, on_delete=models.PROTECT)
 
+    objects = TournamentQuerySet.as_manager()
+
+    class Meta:
+        # Running and upcoming tournaments end in the future, which is a small
+        # part of the tournament history
+        indexes = [
+            models.Index(fields=['end_date', 'opening_date'], name='tournament_dates_idx'),
+        ]
+
     @property
     def prize(self):
-        total = Sponsorship.objects.filter(tournament=self).aggregate(Sum('amount'))
-        return total['amount__sum'] or 0
+        return tournament_sponsorship(self.id)[0]
 
     @property
     def status(self):
@@ -142,10 +313,14 @@ class Tournament(models.Model):
 
     @property
     def main_sponsor(self):
-        try:
-            return self.sponsorship_set.get(type='MAIN').sponsor
-        except Sponsorship.DoesNotExist:
-            return None
+        return tournament_sponsorship(self.id)[1]
+
+    # Registered teams annotated with matches played and won in this tournament
+    # and their rank, teams are ranked by won matches and then by win ratio
+    def standings(self):
+        ranking = [F('won_matches').desc(), F('win_percentage').desc(nulls_last=True)]
+        teams = self.team_set.with_match_stats(tournament_id=self.id)
+        return teams.annotate(rank=Window(expression=Rank(), order_by=ranking)).order_by('rank', 'name')
 
     @property
     def in_progress(self):
@@ -181,6 +356,25 @@ class Sponsorship(models.Model):
         unique_together = ('sponsor', 'tournament')
 
 
+class ClanQuerySet(models.QuerySet):
+    def with_match_stats(self):
+        matches = Match.objects.filter(Q(clan_1=OuterRef('pk')) | Q(clan_2=OuterRef('pk')))
+        won = Match.objects.filter(Q(clan_1=OuterRef('pk'), team_1=F('winner')) |
+                                   Q(clan_2=OuterRef('pk'), team_2=F('winner')))
+        queryset = self.annotate(**match_stats_annotations(matches, won))
+        return queryset.annotate(win_percentage=win_percentage())
+
+    # Annotates clans with MembershipStatus value of given player
+    def with_membership(self, player):
+        pending = Player.clan_pendings.through.objects.filter(clan=OuterRef('pk'), player=player)
+        return self.annotate(membership=Case(
+            When(pk=player.clan_id, then=Value(MembershipStatus.MEMBER.value)),
+            When(Exists(pending), then=Value(MembershipStatus.PENDING.value)),
+            default=Value(MembershipStatus.NOT_MEMBER.value),
+            output_field=models.IntegerField(),
+        ))
+
+
 class Clan(models.Model):
     name = models.CharField(max_length=200, unique=True)
     slug = models.SlugField(max_length=200, unique=True)
@@ -190,23 +384,29 @@ class Clan(models.Model):
     leader = models.ForeignKey('Player', on_delete=models.SET_NULL, null=True, blank=True,
                                verbose_name="Leader of the clan", related_name="clan_leader")
 
+    objects = ClanQuerySet.as_manager()
+
     @property
     def all_matches(self):
-        return self.clan_matches_a.all().union(self.clan_matches_b.all())
+        return Match.objects.filter(Q(clan_1=self) | Q(clan_2=self))
 
     @property
     def matches_won(self):
-        matches = self.clan_matches_a.filter(team_1=F('winner'))
-        return matches.union(self.clan_matches_b.filter(team_2=F('winner')))
+        return Match.objects.filter(Q(clan_1=self, team_1=F('winner')) | Q(clan_2=self, team_2=F('winner')))
+
+    @property
+    def first_match_date(self):
+        return first_match_date(Match.objects.filter(clan_1=self), Match.objects.filter(clan_2=self))
 
     @property
     def win_ratio(self):
+        if hasattr(self, 'total_matches'):
+            # Annotated by ClanQuerySet.with_match_stats()
+            return format_win_ratio(self.won_matches, self.total_matches)
         matches_total = self.all_matches.count()
         if not matches_total:
             return None
-        matches_won = self.matches_won.count()
-        ratio = round((matches_won / matches_total) * 100, 2)
-        return str(ratio) + " %"
+        return format_win_ratio(self.matches_won.count(), matches_total)
 
     @property
     def games(self):
@@ -223,6 +423,42 @@ class Clan(models.Model):
         super().save(*args, **kwargs)
 
 
+class TeamQuerySet(models.QuerySet):
+    def with_match_stats(self, tournament_id=None):
+        matches = Match.objects.filter(Q(team_1=OuterRef('pk')) | Q(team_2=OuterRef('pk')))
+        won = Match.objects.filter(winner=OuterRef('pk'))
+        if tournament_id is not None:
+            matches = matches.filter(tournament_id=tournament_id)
+            won = won.filter(tournament_id=tournament_id)
+        queryset = self.annotate(**match_stats_annotations(matches, won))
+        return queryset.annotate(win_percentage=win_percentage())
+
+    # Teams with a match in progress
+    def currently_playing(self):
+        running = in_progress(Match.objects.all())
+        return self.filter(Q(pk__in=running.values('team_1')) | Q(pk__in=running.values('team_2')))
+
+    # Annotates whether the team has a match in progress, see Team.is_playing
+    def with_playing_status(self):
+        return self.annotate(playing=Case(
+            When(Exists(in_progress(Match.objects.filter(team_1=OuterRef('pk')))), then=Value(True)),
+            When(Exists(in_progress(Match.objects.filter(team_2=OuterRef('pk')))), then=Value(True)),
+            default=Value(False),
+            output_field=models.BooleanField(),
+        ))
+
+    # Annotates teams with MembershipStatus value of given player
+    def with_membership(self, player):
+        member = Player.teams.through.objects.filter(team=OuterRef('pk'), player=player)
+        pending = Player.team_pendings.through.objects.filter(team=OuterRef('pk'), player=player)
+        return self.annotate(membership=Case(
+            When(Exists(member), then=Value(MembershipStatus.MEMBER.value)),
+            When(Exists(pending), then=Value(MembershipStatus.PENDING.value)),
+            default=Value(MembershipStatus.NOT_MEMBER.value),
+            output_field=models.IntegerField(),
+        ))
+
+
 class Team(models.Model):
     name = models.CharField(max_length=200, unique=True)
     slug = models.SlugField(max_length=200, unique=True)
@@ -239,33 +475,38 @@ class Team(models.Model):
     clan_pending = models.ForeignKey(Clan, on_delete=models.SET_NULL, related_name='team_requests',
                                      null=True, blank=True)
 
+    objects = TeamQuerySet.as_manager()
+
     def as_array(self):
         return [self.id, self.name]
 
     @property
     def all_matches(self):
-        return self.matches_a.all().union(self.matches_b.all())
+        return Match.objects.filter(Q(team_1=self) | Q(team_2=self))
+
+    @property
+    def first_match_date(self):
+        return first_match_date(Match.objects.filter(team_1=self), Match.objects.filter(team_2=self))
 
     @property
     def win_ratio(self):
-        matches_total = self.all_matches.count()
-        if not matches_total:
-            return "No matches"
-        matches_won = self.matches_won.count()
-        ratio = round((matches_won / matches_total) * 100, 2)
-        return str(ratio) + " %"
+        if hasattr(self, 'total_matches'):
+            # Annotated by TeamQuerySet.with_match_stats()
+            matches_total, matches_won = self.total_matches, self.won_matches
+        else:
+            matches_total = self.all_matches.count()
+            matches_won = self.matches_won.count() if matches_total else 0
+        return format_win_ratio(matches_won, matches_total) or "No matches"
 
     @property
     def is_playing(self):
-        match = PlayedMatch.objects.filter(team=self)
-        if not match:
-            return False
-        match = match.latest("id").match
-        return match.in_progress
+        if hasattr(self, 'playing'):
+            # Annotated by TeamQuerySet.with_playing_status()
+            return self.playing
+        return in_progress(self.all_matches).exists()
 
     def all_tournament_matches(self, tournament_id):
-        return self.matches_a.filter(tournament_id=tournament_id).union(
-            self.matches_b.filter(tournament_id=tournament_id))
+        return self.all_matches.filter(tournament_id=tournament_id)
 
     def win_ratio_tournament(self, tournament_id):
         matches_total = self.all_tournament_matches(tournament_id).count()
@@ -273,11 +514,21 @@ class Team(models.Model):
             return None
 
         matches_won = self.matcher_won_tournament(tournament_id).count()
-        return str(round((matches_won / matches_total) * 100, 2)) + "%"
+        return format_win_ratio(matches_won, matches_total, separator='')
 
     def matcher_won_tournament(self, tournament_id):
         return Match.objects.filter(Q(tournament_id=tournament_id) & Q(winner=self.id))
 
+    # Team can join only clan which all its members belong to, so the result is
+    # either the one clan shared by all members or empty. Clan of any member is
+    # looked up through membership index and then verified by checking that no
+    # member is outside of it. Team without members can join any clan
+    def eligible_clans(self):
+        members = Player.objects.filter(teams=self).order_by()
+        outsiders = members.exclude(clan=OuterRef('pk'))
+        shared = Q(pk=Subquery(members.values('clan')[:1])) | ~Exists(members)
+        return Clan.objects.filter(shared).exclude(Exists(outsiders))
+
     def __str__(self):
         return self.name
 
@@ -288,6 +539,19 @@ class Team(models.Model):
         super().save(*args, **kwargs)
 
 
+# Cursors of events of a match are seconds elapsed since its beginning, no
+# match lasts longer than a day
+MAX_MATCH_TIME = datetime.timedelta(days=1)
+
+
+# Raises ValueError when value isn't a time within a match
+def parse_match_time(value):
+    seconds = float(value)
+    if not 0 <= seconds <= MAX_MATCH_TIME.total_seconds():
+        raise ValueError('Match time out of range')
+    return datetime.timedelta(seconds=seconds)
+
+
 class Match(models.Model):
     beginning = models.DateTimeField('beginning of the match', default=timezone.now)
     duration = models.DurationField('duration of the match', null=True, blank=True, )
@@ -309,6 +573,27 @@ class Match(models.Model):
                                verbose_name='winning team', null=True, blank=True, )
     clan_winner = models.ForeignKey(Clan, on_delete=models.PROTECT, related_name='matches_won',
                                     null=True, blank=True)
+    # Derived from beginning and duration, allows index lookups of running matches
+    ending = models.DateTimeField('end of the match', null=True, blank=True, editable=False)
+
+    class Meta:
+        # Participation lookups (all_matches) filter by either side of the match
+        # and are usually ordered or bounded by the beginning of the match
+        indexes = [
+            models.Index(fields=['team_1', 'beginning'], name='match_team_1_beginning_idx'),
+            models.Index(fields=['team_2', 'beginning'], name='match_team_2_beginning_idx'),
+            models.Index(fields=['clan_1', 'beginning'], name='match_clan_1_beginning_idx'),
+            models.Index(fields=['clan_2', 'beginning'], name='match_clan_2_beginning_idx'),
+            models.Index(fields=['game', 'beginning'], name='match_game_beginning_idx'),
+            # Newest matches first in the list of all matches, see TournamentView
+            models.Index(fields=['beginning', 'id'], name='match_beginning_idx'),
+            # Running matches end in the future, see in_progress()
+            models.Index(fields=['ending'], name='match_ending_idx'),
+            models.Index(fields=['team_1', 'ending'], name='match_team_1_ending_idx'),
+            models.Index(fields=['team_2', 'ending'], name='match_team_2_ending_idx'),
+            # Wins of a team in a tournament, see TeamQuerySet.with_match_stats()
+            models.Index(fields=['tournament', 'winner'], name='match_tournament_winner_idx'),
+        ]
 
     @property
     def duration_fmt(self):
@@ -325,10 +610,26 @@ class Match(models.Model):
     def in_progress(self):
         return self.beginning <= timezone.now() <= (self.beginning + self.duration)
 
+    # Time elapsed since the beginning of the match
+    @property
+    def elapsed(self):
+        return timezone.now() - self.beginning
+
+    # Deaths which happened later than after (if given) and not later than until,
+    # both are durations from the beginning of the match. Killers, victims and
+    # assists with their players are loaded along
+    def deaths_between(self, after, until):
+        deaths = self.death_set.filter(match_time__lte=until)
+        if after is not None:
+            deaths = deaths.filter(match_time__gt=after)
+        assists = Prefetch('assist_set', queryset=Assist.objects.select_related('player').order_by('id'))
+        return deaths.select_related('killer', 'victim').prefetch_related(assists).order_by('match_time', 'id')
+
     def save(self, *args, **kwargs):
         self.clan_1 = self.team_1.clan
         self.clan_2 = self.team_2.clan
         self.clan_winner = self.winner.clan
+        self.ending = self.beginning + self.duration if self.duration is not None else None
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -349,6 +650,14 @@ UserRoleNames = {
 }
 
 
+class PlayerQuerySet(models.QuerySet):
+    def with_match_stats(self):
+        matches = PlayedMatch.objects.filter(player=OuterRef('pk'))
+        won = matches.filter(won=True)
+        queryset = self.annotate(**match_stats_annotations(matches, won))
+        return queryset.annotate(win_percentage=win_percentage())
+
+
 class Player(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
     nickname = models.CharField(max_length=50, unique=True)
@@ -364,32 +673,21 @@ class Player(models.Model):
     clan_pendings = models.ManyToManyField(Clan, related_name='clan_pendings')
     matches = models.ManyToManyField(Match, through='PlayedMatch', verbose_name='Played matches')
 
-    def game_stats(self, game):
-        game_deaths = Death.objects.filter(match__game=game)
-        game_assists = Assist.objects.filter(death__match__game=game)
-        player_kills = game_deaths.filter(killer=self).count()
-        player_deaths = game_deaths.filter(victim=self).count()
-        player_assists = game_assists.filter(player=self).count()
-        player_kda = round((player_kills + player_assists) / max(1, player_deaths), 2)
-        matches = PlayedMatch.objects.filter(player=self, match__game=game)
-        if matches.exists():
-            won_count = matches.filter(team=F('match__winner')).count()
-            win_ratio = round((won_count / matches.count()) * 100, 2)
-        else:
-            win_ratio = None
-        return player_kda, str(win_ratio) + "%"
+    objects = PlayerQuerySet.as_manager()
 
-    @property
+    # Upcoming and running tournaments of the player's teams, computed once per
+    # instance because page templates read them several times
+    @cached_property
     def tournaments(self):
-        registered = self.teams.all()
-        tournaments = RegisteredTeams.objects.filter(team__in=registered)
+        today = timezone.now().date()
+        tournaments = Tournament.objects.filter(team__team_members=self, end_date__gte=today).distinct()
         upcoming = set()
         active = set()
         for tournament in tournaments:
-            if tournament.tournament.opening_date > timezone.now().date():
-                upcoming.add(tournament.tournament)
-            elif tournament.tournament.opening_date <= timezone.now().date() <= tournament.tournament.end_date:
-                active.add(tournament.tournament)
+            if tournament.opening_date > today:
+                upcoming.add(tournament)
+            else:
+                active.add(tournament)
         return (upcoming, active)
 
     @property
@@ -406,16 +704,15 @@ class Player(models.Model):
 
     @property
     def matches_won(self):
-        PlayedMatch.objects.filter(player=self)
-        return
+        return self.matches.filter(playedmatch__won=True)
 
     @property
     def win_ratio(self):
-        games_total = self.matches.count()
-        if not games_total:
-            return None
-        games_won = self.matches.filter(playedmatch__team=F('playedmatch__match__winner')).count()
-        return str(round((games_won / games_total) * 100, 2)) + " %"
+        if hasattr(self, 'total_matches'):
+            # Annotated by PlayerQuerySet.with_match_stats()
+            return format_win_ratio(self.won_matches, self.total_matches)
+        stats = self.playedmatch_set.aggregate(total=Count('pk'), won=Count('pk', filter=Q(won=True)))
+        return format_win_ratio(stats['won'], stats['total'])
 
     @property
     def full_name(self):
@@ -446,20 +743,58 @@ class Player(models.Model):
         super().save(*args, **kwargs)
 
 
+class PlayedMatchQuerySet(models.QuerySet):
+    # Recomputes stored outcome and counters of played matches in this queryset
+    # from matches, deaths and assists with single UPDATE
+    def fill_stats(self):
+        return self.update(
+            won=Exists(Match.objects.filter(pk=OuterRef('match'), winner=OuterRef('team'))),
+            kills=count_subquery(Death.objects.filter(match=OuterRef('match'), killer=OuterRef('player'))),
+            deaths=count_subquery(Death.objects.filter(match=OuterRef('match'), victim=OuterRef('player'))),
+            assists=count_subquery(Assist.objects.filter(death__match=OuterRef('match'), player=OuterRef('player'))),
+        )
+
+
 class PlayedMatch(models.Model):
     player = models.ForeignKey(Player, on_delete=models.PROTECT)
     match = models.ForeignKey(Match, on_delete=models.PROTECT)
     team = models.ForeignKey(Team, on_delete=models.PROTECT)
     clan = models.ForeignKey(Clan, on_delete=models.PROTECT)
 
-    # game_won = models.BooleanField('game won')
+    # Outcome and events of the player in the match are stored with the row, so
+    # that player, team and clan statistics are sums over this table instead of
+    # joins of matches, deaths and assists. Counters are filled when deaths and
+    # assists are saved, existing rows by migration 0049 and the
+    # backfill_played_match_stats command recomputes them
+    won = models.BooleanField('game won', default=False)
+    kills = models.PositiveIntegerField(default=0)
+    deaths = models.PositiveIntegerField(default=0)
+    assists = models.PositiveIntegerField(default=0)
 
-    @property
-    def game_won(self):
-        return self.match.winner.id == self.team.id
+    objects = PlayedMatchQuerySet.as_manager()
+
+    @classmethod
+    def increment(cls, match_id, player_id, **counters):
+        cls.objects.filter(match_id=match_id, player_id=player_id).update(
+            **{key: F(key) + value for key, value in counters.items()})
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        if created:
+            self.won = self.team_id == self.match.winner_id
+        super().save(*args, **kwargs)
+        if created:
+            PlayerGameStats.increment(self.player_id, self.match.game_id, matches_played=1,
+                                      matches_won=int(self.won))
 
     class Meta:
         unique_together = ('player', 'match')
+        # Win statistics of players, team members and clan members read only the index
+        indexes = [
+            models.Index(fields=['player', 'won'], name='played_match_player_won_idx'),
+            models.Index(fields=['team', 'player', 'won'], name='played_match_team_player_idx'),
+            models.Index(fields=['clan', 'player', 'won'], name='played_match_clan_player_idx'),
+        ]
 
 
 class RegisteredTeams(models.Model):
@@ -474,6 +809,15 @@ class Death(models.Model):
     killer = models.ForeignKey(Player, on_delete=models.PROTECT, related_name='kills', null=True, blank=True,
                                verbose_name='Killer')
 
+    class Meta:
+        # Match timeline is read ordered and bounded by match time
+        indexes = [
+            models.Index(fields=['match', 'match_time'], name='death_match_time_idx'),
+            # Deaths and kills of a player in a match, see PlayedMatchQuerySet.fill_stats()
+            models.Index(fields=['match', 'victim'], name='death_match_victim_idx'),
+            models.Index(fields=['match', 'killer'], name='death_match_killer_idx'),
+        ]
+
     @property
     def match_time_fmt(self):
         seconds = int(self.match_time.total_seconds())
@@ -481,6 +825,17 @@ class Death(models.Model):
         seconds = seconds % 60
         return '{0}m {1}s'.format(minutes, seconds)
 
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        if created:
+            game_id = self.match.game_id
+            PlayerGameStats.increment(self.victim_id, game_id, deaths=1)
+            PlayedMatch.increment(self.match_id, self.victim_id, deaths=1)
+            if self.killer_id:
+                PlayerGameStats.increment(self.killer_id, game_id, kills=1)
+                PlayedMatch.increment(self.match_id, self.killer_id, kills=1)
+
 
 class Assist(models.Model):
     ASSISTANCE_TYPE = (
@@ -490,3 +845,70 @@ class Assist(models.Model):
     death = models.ForeignKey(Death, on_delete=models.PROTECT, verbose_name='Related death')
     player = models.ForeignKey(Player, on_delete=models.PROTECT, verbose_name='Assisting player')
     type = models.CharField('Type of assistance', max_length=20, choices=ASSISTANCE_TYPE)
+
+    class Meta:
+        # Assists of a player in a match, see PlayedMatchQuerySet.fill_stats()
+        indexes = [
+            models.Index(fields=['player', 'death'], name='assist_player_death_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        created = self._state.adding
+        super().save(*args, **kwargs)
+        if created:
+            PlayerGameStats.increment(self.player_id, self.death.match.game_id, assists=1)
+            PlayedMatch.increment(self.death.match_id, self.player_id, assists=1)
+
+
+# Per player and game aggregate of played matches, kills, deaths and assists.
+# Rows are kept up to date by PlayedMatch, Death and Assist save methods so that
+# statistics pages don't have to count the event tables on every request
+class PlayerGameStats(models.Model):
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='game_stats')
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='player_stats')
+    kills = models.PositiveIntegerField(default=0)
+    deaths = models.PositiveIntegerField(default=0)
+    assists = models.PositiveIntegerField(default=0)
+    matches_played = models.PositiveIntegerField(default=0)
+    matches_won = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('player', 'game')
+
+    @classmethod
+    def increment(cls, player_id, game_id, **counters):
+        if game_id is None:
+            # Matches without related game are not part of any game statistics
+            return
+        stats, _ = cls.objects.get_or_create(player_id=player_id, game_id=game_id)
+        cls.objects.filter(pk=stats.pk).update(**{key: F(key) + value for key, value in counters.items()})
+
+    # Bulk version of increment, counters maps (player_id, game_id) keys
+    # to dictionaries of counter increments
+    @classmethod
+    def increment_many(cls, counters):
+        counters = {key: value for key, value in counters.items() if key[1] is not None}
+        if not counters:
+            return
+        player_ids = {player_id for player_id, _ in counters}
+        game_ids = {game_id for _, game_id in counters}
+        cls.objects.bulk_create([cls(player_id=player_id, game_id=game_id) for player_id, game_id in counters],
+                                ignore_conflicts=True)
+        rows = cls.objects.select_for_update().filter(player_id__in=player_ids, game_id__in=game_ids)
+        updated = []
+        for stats in rows:
+            increments = counters.get((stats.player_id, stats.game_id))
+            if increments:
+                for key, value in increments.items():
+                    setattr(stats, key, getattr(stats, key) + value)
+                updated.append(stats)
+        fields = {key for increments in counters.values() for key in increments}
+        cls.objects.bulk_update(updated, fields)
+
+    @property
+    def kda(self):
+        return round((self.kills + self.assists) / max(1, self.deaths), 2)
+
+    @property
+    def win_ratio(self):
+        return format_win_ratio(self.matches_won, self.matches_played, separator='')
@@ -0,0 +1,19 @@
+# Context of a page built once per request. Sections are functions returning
+# parts of the context which are evaluated only when the page is rendered, so
+# POST actions don't pay for context computed before the action changes data.
+# Values set directly, e.g. forms with validation errors, override the sections
+class PageContext:
+    def __init__(self, context=None, sections=()):
+        self.context = dict(context or {})
+        self.sections = list(sections)
+        self.values = {}
+
+    def __setitem__(self, key, value):
+        self.values[key] = value
+
+    def build(self):
+        context = dict(self.context)
+        for section in self.sections:
+            context.update(section())
+        context.update(self.values)
+        return context
@@ -0,0 +1,226 @@
+import base64
+import binascii
+import datetime
+import json
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+
+
+class ListJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            # Values like countries are sent as their string representation
+            return str(o)
+
+
+class CursorJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # DjangoJSONEncoder cuts datetimes to milliseconds, the seek has to
+        # compare against the exact value stored in the row
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    data = json.dumps(values, cls=CursorJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+# Fields are model fields of the cursor values, or None for values compared as
+# they are (e.g. annotations), the values are parsed back by these fields
+def decode_cursor(cursor, fields):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, binascii.Error, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+    try:
+        return [field.to_python(value) if field else value for field, value in zip(fields, values)]
+    except ValidationError:
+        return None
+
+
+class KeysetPage:
+    def __init__(self, object_list, request, prefix, next_cursor, previous_cursor, fields=()):
+        self.object_list = object_list
+        self.fields = fields
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.request = request
+        self.prefix = prefix
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def query_string(self, key, cursor):
+        # Keep other parameters of the request, e.g. cursors of other tables on the page
+        query = self.request.GET.copy() if self.request else None
+        if query is None:
+            return ''
+        query.pop(self.prefix + 'after', None)
+        query.pop(self.prefix + 'before', None)
+        query[self.prefix + key] = cursor
+        return query.urlencode()
+
+    @property
+    def next_query(self):
+        return self.query_string('after', self.next_cursor)
+
+    @property
+    def previous_query(self):
+        return self.query_string('before', self.previous_cursor)
+
+    # Only declared fields are sent, they may be attributes, properties, methods
+    # or related objects, e.g. 'player__clan', the same values the tables show
+    def item_dict(self, item):
+        data = {'pk': item.pk, 'str': str(item)}
+        for name in self.fields:
+            value = item
+            for attribute in name.split('__'):
+                value = getattr(value, attribute) if value is not None else None
+            data[name] = value() if callable(value) else value
+        return data
+
+    def as_dict(self):
+        return {
+            'items': [self.item_dict(item) for item in self.object_list],
+            'next': self.next_cursor,
+            'previous': self.previous_cursor,
+        }
+
+
+# Seek pagination over queryset ordered by given fields. Cursor holds ordering
+# values of the last (or first) row of a page and the next page is selected by
+# comparing rows against it, so the cost of a page doesn't depend on its position.
+# Ordering fields may be prefixed with '-' for descending order, primary key is
+# appended to make the ordering total. Fields must not contain NULL values
+class KeysetPaginator:
+    def __init__(self, queryset, ordering, per_page=50, prefix='', fields=()):
+        ordering = list(ordering)
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('pk')
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+        self.prefix = prefix
+        self.fields = fields
+
+    @staticmethod
+    def seek_filter(ordering, values, backwards):
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        query = Q()
+        equal = {}
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != backwards
+            lookup = '{0}__{1}'.format(name, 'lt' if descending else 'gt')
+            query |= Q(**equal, **{lookup: value})
+            equal[name] = value
+        # Redundant bound of the first field (a >= x) is a range the database
+        # can seek to in an index, the disjunction alone is evaluated row by row
+        field = ordering[0]
+        descending = field.startswith('-') != backwards
+        bound = Q(**{'{0}__{1}'.format(field.lstrip('-'), 'lte' if descending else 'gte'): values[0]})
+        return bound & query
+
+    @staticmethod
+    def reversed_ordering(ordering):
+        return [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+
+    def cursor(self, item):
+        return encode_cursor([getattr(item, field.lstrip('-')) for field in self.ordering])
+
+    def cursor_fields(self):
+        fields = []
+        for name in self.ordering:
+            name = name.lstrip('-')
+            try:
+                fields.append(self.queryset.model._meta.get_field(name) if name != 'pk'
+                              else self.queryset.model._meta.pk)
+            except FieldDoesNotExist:
+                fields.append(None)
+        return fields
+
+    def page(self, after=None, before=None, request=None):
+        fields = self.cursor_fields()
+        after = decode_cursor(after, fields) if after else None
+        before = decode_cursor(before, fields) if before else None
+        queryset = self.queryset
+        backwards = before is not None and after is None
+        if backwards:
+            queryset = queryset.filter(self.seek_filter(self.ordering, before, True))
+            queryset = queryset.order_by(*self.reversed_ordering(self.ordering))
+        else:
+            if after is not None:
+                queryset = queryset.filter(self.seek_filter(self.ordering, after, False))
+            queryset = queryset.order_by(*self.ordering)
+
+        # One extra row tells us whether there is another page in this direction
+        items = list(queryset[:self.per_page + 1])
+        more = len(items) > self.per_page
+        items = items[:self.per_page]
+        if backwards:
+            items.reverse()
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, after is not None
+
+        next_cursor = self.cursor(items[-1]) if items and has_next else None
+        previous_cursor = self.cursor(items[0]) if items and has_previous else None
+        return KeysetPage(items, request, self.prefix, next_cursor, previous_cursor, self.fields)
+
+    def page_from_request(self, request):
+        params = request.GET
+        return self.page(params.get(self.prefix + 'after'), params.get(self.prefix + 'before'), request)
+
+
+# Provides keyset paginated lists to class based views. Lists are returned by
+# get_keyset_lists() as dictionary mapping name of the list to tuple (queryset,
+# ordering, fields). Cursors of each list are passed in GET parameters prefixed
+# with the list name, AJAX requests with 'list' parameter receive the page as
+# JSON holding primary key, string representation and given fields of each row
+class KeysetListMixin:
+    page_size = 50
+
+    def get_keyset_lists(self):
+        return {}
+
+    # Called with each page of a list before its rows are displayed, e.g. to
+    # load values shown in all rows at once
+    def prepare_keyset_page(self, name, page):
+        pass
+
+    def get_keyset_page(self, name):
+        queryset, ordering, fields = self.get_keyset_lists()[name]
+        paginator = KeysetPaginator(queryset, ordering, self.page_size, prefix=name + '_', fields=fields)
+        page = paginator.page_from_request(self.request)
+        self.prepare_keyset_page(name, page)
+        return page
+
+    def keyset_list_response(self, name):
+        if name not in self.get_keyset_lists():
+            raise Http404('Unknown list')
+        page = self.get_keyset_page(name)
+        return JsonResponse(page.as_dict(), encoder=ListJSONEncoder)
+
+    def get(self, request, *args, **kwargs):
+        if request.is_ajax() and 'list' in request.GET:
+            return self.keyset_list_response(request.GET['list'])
+        return super().get(request, *args, **kwargs)
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from leagues.models import Sponsor, Sponsorship, invalidate_tournament_cache, invalidate_model_cache
+
+# Applications whose models are displayed in cached lists
+VERSIONED_APPS = ('leagues', 'auth')
+
+# Fields no cached list displays, saves of only these fields keep the lists.
+# Django saves last_login of the user on every login
+UNLISTED_FIELDS = {'last_login'}
+
+
+@receiver(post_save, sender=Sponsorship)
+@receiver(post_delete, sender=Sponsorship)
+@receiver(post_save, sender=Sponsor)
+def sponsorship_changed(sender, **kwargs):
+    # Prize and main sponsor of tournaments depend on sponsorships
+    invalidate_tournament_cache()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def model_changed(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= UNLISTED_FIELDS:
+        return
+    if sender._meta.app_label in VERSIONED_APPS:
+        invalidate_model_cache(sender)
+
+
+@receiver(m2m_changed)
+def relation_changed(sender, instance, action, model, **kwargs):
+    # Many to many relation changes both sides of the relation
+    if action.startswith('post_') and sender._meta.app_label in VERSIONED_APPS:
+        invalidate_model_cache(type(instance))
+        invalidate_model_cache(model)
@@ -0,0 +1,463 @@
+import datetime
+import random
+from collections import defaultdict, namedtuple
+from multiprocessing import Pool
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.template.defaultfilters import slugify
+from django.utils import timezone
+from leagues.models import Genre, GameMode, Game, Sponsor, Sponsorship, Tournament, RegisteredTeams, Clan, Team, \
+    Player, Match, PlayedMatch, Death, Assist, PlayerGameStats, invalidate_model_cache, invalidate_tournament_cache
+from leagues.match_simulation import ASSIST_TYPES, NumPyEventGenerator, random_duration, event_generator
+
+# Synthetic leagues for development and benchmarks. Rows are written with bulk
+# inserts which skip save() methods, so fields normally derived there (slugs,
+# clans and end of matches) are filled here. Generated data keeps invariants
+# enforced by forms and model actions: players are at least 15 years old,
+# leaders are members of their clans and teams, members of a team belong to its
+# clan, a clan registers at most one team for a tournament and matches are
+# played between registered teams within tournament dates
+
+# Sample objects of a built league, one of each kind for detail pages
+League = namedtuple('League', ['genre', 'game', 'game_mode', 'tournament', 'clan', 'team', 'player', 'match'])
+
+# Sizes of teams of generated game modes
+GAME_MODE_SIZES = (5, 3, 2)
+
+
+def bulk_insert(model, objects, batch_size=2000):
+    # Bulk insert which sets primary keys also on backends which don't return
+    # them. Rows are inserted in one transaction, so the new rows are exactly
+    # those with higher primary key than the last row before the insert
+    with transaction.atomic():
+        last = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+        model.objects.bulk_create(objects, batch_size=batch_size)
+        if objects and objects[0].pk is None:
+            ids = model.objects.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True)
+            for instance, pk in zip(objects, ids.iterator()):
+                instance.pk = pk
+    return objects
+
+
+def prepared_rows(fields, rows):
+    # Numbers and strings are passed to the database as they are
+    database = connections[DEFAULT_DB_ALIAS]
+    prepare = [field.get_db_prep_save for field in fields]
+    return [[value if isinstance(value, (int, str)) else prep(value, database) for prep, value in zip(prepare, row)]
+            for row in rows]
+
+
+def insert_rows(model, fields, rows):
+    # Plain INSERT of value tuples. Unlike bulk_create it doesn't construct model
+    # instances, which dominates the time of inserting millions of event rows
+    fields = [model._meta.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {0} ({1}) VALUES ({2})'.format(quote(model._meta.db_table),
+                                                      ', '.join(quote(field.column) for field in fields),
+                                                      ', '.join(['%s'] * len(fields)))
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, prepared_rows(fields, rows))
+
+
+def update_rows(model, field, rows):
+    # Sets field of rows given as (value, primary key) pairs
+    fields = [model._meta.get_field(field), model._meta.pk]
+    quote = connection.ops.quote_name
+    sql = 'UPDATE {0} SET {1} = %s WHERE {2} = %s'.format(quote(model._meta.db_table), quote(fields[0].column),
+                                                         quote(fields[1].column))
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, prepared_rows(fields, rows))
+
+
+def next_id(model):
+    return (model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0) + 1
+
+
+def named(model, name, **fields):
+    return model(name=name, slug=slugify(name), **fields)
+
+
+def aware(day, time=datetime.time()):
+    return timezone.make_aware(datetime.datetime.combine(day, time))
+
+
+# Generates events of a chunk of matches, runs in worker processes. Task is
+# tuple (seed, matches) with matches given as (match ID, duration in seconds,
+# lineup of team 1, lineup of team 2). Events are returned as plain tuples
+# (match ID, match time in seconds, victim ID, killer ID, assists), assists
+# being (player ID, type) pairs
+def generate_events(task):
+    seed, matches = task
+    simulations = []
+    for match_id, duration, players_1, players_2 in matches:
+        match = Match(id=match_id, duration=datetime.timedelta(seconds=duration),
+                      game_mode=GameMode(team_player_count=len(players_1)))
+        simulations.append((match, players_1, players_2))
+    generator = event_generator(seed)
+    if not isinstance(generator, NumPyEventGenerator):
+        return [(death.match_id, int(death.match_time.total_seconds()), death.victim_id, death.killer_id, assists)
+                for death, assists in generator.events(simulations)]
+
+    # Timelines are converted directly, without intermediate Death instances
+    events = []
+    for group, timeline in generator.timelines(simulations):
+        match_ids = [match.id for match, _, _ in group]
+        rows = zip(timeline.match_index.tolist(), timeline.times.tolist(), timeline.victims.tolist(),
+                   timeline.killers.tolist(), timeline.assists.tolist(), timeline.assist_types.tolist())
+        for index, time, victim, killer, assists, assist_types in rows:
+            assists = [(player, ASSIST_TYPES[assist_type])
+                       for player, assist_type in zip(assists, assist_types) if player != -1]
+            events.append((match_ids[index], time, victim, killer, assists))
+    return events
+
+
+class LeagueSeeder:
+    def __init__(self, prefix='Synthetic', seed=None, workers=1, batch_size=1000, history_days=365, log=None):
+        self.prefix = prefix
+        self.slug_prefix = slugify(prefix)
+        self.rng = random.Random(seed)
+        self.workers = workers
+        self.batch_size = batch_size
+        self.history_days = history_days
+        self.log = log or (lambda message: None)
+        self.today = timezone.now().date()
+        # First day of match history, everything is founded or released before it
+        self.history_start = self.today - datetime.timedelta(days=history_days)
+
+    def name(self, kind, number):
+        return '{0} {1} {2}'.format(self.prefix, kind, number)
+
+    def past_date(self, latest, max_days):
+        return latest - datetime.timedelta(days=self.rng.randint(1, max_days))
+
+    def exists(self):
+        return Genre.objects.filter(name__startswith=self.prefix + ' ').exists()
+
+    def create_genres(self, count):
+        self.genres = bulk_insert(Genre, [named(Genre, self.name('genre', number)) for number in range(count)])
+
+    def create_game_modes(self, sizes=GAME_MODE_SIZES):
+        self.game_modes = bulk_insert(GameMode, [
+            named(GameMode, '{0} {1}v{1}'.format(self.prefix, size), team_player_count=size) for size in sizes])
+
+    def create_games(self, count):
+        rng = self.rng
+        self.games = bulk_insert(Game, [named(Game, self.name('game', number), genre=rng.choice(self.genres),
+                                              release_date=self.past_date(self.history_start, 3000))
+                                        for number in range(count)])
+        self.modes_of_game = {}
+        through = []
+        for game in self.games:
+            modes = rng.sample(self.game_modes, rng.randint(1, len(self.game_modes)))
+            self.modes_of_game[game.id] = modes
+            through.extend(Game.game_modes.through(game_id=game.id, gamemode_id=mode.id) for mode in modes)
+        Game.game_modes.through.objects.bulk_create(through, batch_size=2000)
+
+    def create_sponsors(self, count):
+        self.sponsors = bulk_insert(Sponsor, [Sponsor(name=self.name('sponsor', number)) for number in range(count)])
+
+    def create_clans(self, count):
+        self.clans = bulk_insert(Clan, [named(Clan, self.name('clan', number),
+                                              founded=self.past_date(self.history_start, 1000))
+                                        for number in range(count)])
+
+    # Given fraction of players joins clans, every clan gets at least one
+    # member if possible and its first member becomes the leader
+    def create_players(self, count, members=0.9, staff=0.01):
+        rng = self.rng
+        password = make_password(None)
+        nicknames = ['{0}-{1}'.format(self.slug_prefix, number) for number in range(count)]
+        users = bulk_insert(User, [User(username=nickname, password=password, is_staff=rng.random() < staff)
+                                   for nickname in nicknames])
+        self.players = []
+        self.clan_members = defaultdict(list)
+        joining = int(count * members)
+        for number, (user, nickname) in enumerate(zip(users, nicknames)):
+            clan = None
+            if number < joining:
+                clan = self.clans[number] if number < len(self.clans) else rng.choice(self.clans)
+            player = Player(user=user, nickname=nickname, slug=slugify(nickname), clan=clan,
+                            birth_date=self.today - datetime.timedelta(days=rng.randint(15 * 366, 40 * 365)))
+            self.players.append(player)
+            if clan:
+                self.clan_members[clan.id].append(player)
+        bulk_insert(Player, self.players)
+
+        for clan in self.clans:
+            clan.leader = self.clan_members[clan.id][0] if self.clan_members[clan.id] else None
+        with transaction.atomic():
+            update_rows(Clan, 'leader', [(clan.leader.id, clan.id) for clan in self.clans if clan.leader])
+
+    # Teams are formed by members of one clan, a team has enough members for the
+    # largest mode of its game and up to two substitutes
+    def create_teams(self, count):
+        rng = self.rng
+        clans = [clan for clan in self.clans if self.clan_members[clan.id]]
+        self.teams = []
+        self.team_members = {}
+        lineups = []
+        for number in range(count):
+            clan = rng.choice(clans)
+            game = rng.choice(self.games)
+            size = max(mode.team_player_count for mode in self.modes_of_game[game.id]) + rng.randint(0, 2)
+            candidates = self.clan_members[clan.id]
+            members = rng.sample(candidates, min(size, len(candidates)))
+            lineups.append(members)
+            # Matches may begin on the first day of history, teams must be founded by then
+            founded = min(clan.founded + datetime.timedelta(days=rng.randint(0, 30)), self.history_start)
+            self.teams.append(named(Team, self.name('team', number), game=game, clan=clan, leader=members[0],
+                                    founded=founded))
+        bulk_insert(Team, self.teams)
+        through = []
+        for team, members in zip(self.teams, lineups):
+            self.team_members[team.id] = members
+            through.extend(Team.team_members.through(team_id=team.id, player_id=player.id) for player in members)
+        Team.team_members.through.objects.bulk_create(through, batch_size=2000)
+
+    # Past, running and upcoming tournaments, each with one main sponsor and up to
+    # two side sponsors. A tournament lasts from three days to six weeks
+    def create_tournaments(self, count, upcoming=0.1):
+        rng = self.rng
+        tournaments = []
+        for number in range(count):
+            game = rng.choice(self.games)
+            if rng.random() < upcoming:
+                opening = self.today + datetime.timedelta(days=rng.randint(1, 60))
+            else:
+                opening = self.today - datetime.timedelta(days=rng.randint(1, self.history_days))
+            tournaments.append(named(Tournament, self.name('tournament', number), game=game,
+                                     game_mode=rng.choice(self.modes_of_game[game.id]), opening_date=opening,
+                                     end_date=opening + datetime.timedelta(days=rng.randint(3, 42))))
+        self.tournaments = bulk_insert(Tournament, tournaments)
+        sponsorships = []
+        for tournament in self.tournaments:
+            sponsors = rng.sample(self.sponsors, min(len(self.sponsors), rng.randint(1, 3)))
+            sponsorships.extend(Sponsorship(sponsor=sponsor, tournament=tournament, type='SIDE' if index else 'MAIN',
+                                            amount=rng.randint(1, 100) * 1000)
+                                for index, sponsor in enumerate(sponsors))
+        Sponsorship.objects.bulk_create(sponsorships, batch_size=2000)
+
+    # Registers teams of the tournament's game with enough members,
+    # at most one team of each clan
+    def register_teams(self, per_tournament):
+        rng = self.rng
+        teams_of_game = defaultdict(list)
+        for team in self.teams:
+            teams_of_game[team.game_id].append(team)
+        self.registered = {}
+        rows = []
+        for tournament in self.tournaments:
+            count = tournament.game_mode.team_player_count
+            candidates = [team for team in teams_of_game[tournament.game_id]
+                          if len(self.team_members[team.id]) >= count]
+            rng.shuffle(candidates)
+            clans = set()
+            registered = []
+            for team in candidates:
+                if len(registered) >= per_tournament:
+                    break
+                if team.clan_id not in clans:
+                    clans.add(team.clan_id)
+                    registered.append(team)
+            self.registered[tournament.id] = registered
+            rows.extend(RegisteredTeams(team=team, tournament=tournament) for team in registered)
+        RegisteredTeams.objects.bulk_create(rows, batch_size=2000)
+
+    # Pending requests of players without clan to join clans and of clan
+    # members to join other teams of their clan
+    def create_pendings(self, count):
+        rng = self.rng
+        clan_pendings = set()
+        team_pendings = set()
+        free_agents = [player for player in self.players if player.clan_id is None]
+        for _ in range(count):
+            if free_agents and rng.random() < 0.5:
+                clan_pendings.add((rng.choice(free_agents).id, rng.choice(self.clans).id))
+            elif self.teams:
+                team = rng.choice(self.teams)
+                player = rng.choice(self.clan_members[team.clan_id])
+                if player not in self.team_members[team.id]:
+                    team_pendings.add((player.id, team.id))
+        Player.clan_pendings.through.objects.bulk_create(
+            [Player.clan_pendings.through(player_id=player, clan_id=clan) for player, clan in clan_pendings],
+            batch_size=2000)
+        Player.team_pendings.through.objects.bulk_create(
+            [Player.team_pendings.through(player_id=player, team_id=team) for player, team in team_pendings],
+            batch_size=2000)
+
+    # Finished matches between registered teams of tournaments opened before
+    # today, the shortest window of a day fits any match which ends before now
+    def create_matches(self, count):
+        rng = self.rng
+        now = timezone.now()
+        tournaments = [tournament for tournament in self.tournaments
+                       if len(self.registered[tournament.id]) >= 2 and tournament.opening_date < self.today]
+        self.matches = []
+        self.lineups = {}
+        if not tournaments:
+            return
+        lineups = []
+        for _ in range(count):
+            tournament = rng.choice(tournaments)
+            team_1, team_2 = rng.sample(self.registered[tournament.id], 2)
+            size = tournament.game_mode.team_player_count
+            duration = random_duration(rng)
+            first = aware(tournament.opening_date)
+            last = min(now, aware(tournament.end_date, datetime.time.max)) - duration
+            beginning = first + datetime.timedelta(seconds=rng.randint(0, max(0, int((last - first).total_seconds()))))
+            winner = rng.choice((team_1, team_2))
+            self.matches.append(Match(tournament=tournament, game_id=tournament.game_id,
+                                      game_mode=tournament.game_mode, team_1=team_1, team_2=team_2, winner=winner,
+                                      clan_1_id=team_1.clan_id, clan_2_id=team_2.clan_id,
+                                      clan_winner_id=winner.clan_id, beginning=beginning, duration=duration,
+                                      ending=beginning + duration))
+            # Teams of a tournament are from different clans, so lineups never share players
+            lineups.append(([player.id for player in rng.sample(self.team_members[team_1.id], size)],
+                            [player.id for player in rng.sample(self.team_members[team_2.id], size)]))
+        bulk_insert(Match, self.matches)
+        for match, (players_1, players_2) in zip(self.matches, lineups):
+            self.lineups[match.id] = (players_1, players_2)
+
+    def event_tasks(self):
+        for start in range(0, len(self.matches), self.batch_size):
+            chunk = [(match.id, match.duration_seconds) + self.lineups[match.id]
+                     for match in self.matches[start:start + self.batch_size]]
+            # Seeds are drawn in order, so results don't depend on number of workers
+            yield self.rng.getrandbits(32), chunk
+
+    # Played match rows of a chunk of event tasks with kills, deaths and assists
+    # counted from events of the chunk
+    def played_rows(self, chunk, events):
+        counts = defaultdict(lambda: defaultdict(int))
+        for match_id, _, victim, killer, assists in events:
+            counts[(match_id, victim)]['deaths'] += 1
+            counts[(match_id, killer)]['kills'] += 1
+            for player, _ in assists:
+                counts[(match_id, player)]['assists'] += 1
+
+        rows = []
+        for match_id, _, players_1, players_2 in chunk:
+            match = self.match_by_id[match_id]
+            for team_id, clan_id, players in ((match.team_1_id, match.clan_1_id, players_1),
+                                              (match.team_2_id, match.clan_2_id, players_2)):
+                for player in players:
+                    stats = counts[(match_id, player)]
+                    rows.append((player, match_id, team_id, clan_id, team_id == match.winner_id,
+                                 stats['kills'], stats['deaths'], stats['assists']))
+        return rows
+
+    # Played matches, deaths and assists of all matches. With more than one
+    # worker the events are generated in worker processes, rows are inserted by
+    # this process with primary keys of deaths assigned in advance so that
+    # assists can reference them
+    def create_events(self):
+        death_id = next_id(Death)
+        total = 0
+        counters = self.stats_counters()
+        games = {match.id: match.game_id for match in self.matches}
+        self.match_by_id = {match.id: match for match in self.matches}
+        tasks = list(self.event_tasks())
+        pool = None
+        if self.workers > 1:
+            # Workers must not inherit open database connections
+            connections.close_all()
+            pool = Pool(self.workers, initializer=django.setup)
+        try:
+            results = pool.imap(generate_events, tasks) if pool else map(generate_events, tasks)
+            for (_, chunk), events in zip(tasks, results):
+                deaths = []
+                assists = []
+                for match_id, seconds, victim, killer, death_assists in events:
+                    deaths.append((death_id, match_id, datetime.timedelta(seconds=seconds), victim, killer))
+                    game_id = games[match_id]
+                    counters[(victim, game_id)]['deaths'] += 1
+                    counters[(killer, game_id)]['kills'] += 1
+                    for player, assist_type in death_assists:
+                        assists.append((death_id, player, assist_type))
+                        counters[(player, game_id)]['assists'] += 1
+                    death_id += 1
+                with transaction.atomic():
+                    insert_rows(PlayedMatch, ['player', 'match', 'team', 'clan', 'won', 'kills', 'deaths', 'assists'],
+                                self.played_rows(chunk, events))
+                    insert_rows(Death, ['id', 'match', 'match_time', 'victim', 'killer'], deaths)
+                    insert_rows(Assist, ['death', 'player', 'type'], assists)
+                total += len(deaths)
+                self.log('{0} deaths'.format(total))
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        # Sequences don't know about explicitly assigned primary keys
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Death]):
+                cursor.execute(sql)
+        self.update_stats(counters)
+        return total
+
+    def stats_counters(self):
+        counters = defaultdict(lambda: defaultdict(int))
+        for match in self.matches:
+            players_1, players_2 = self.lineups[match.id]
+            for team_id, players in ((match.team_1_id, players_1), (match.team_2_id, players_2)):
+                for player in players:
+                    stats = counters[(player, match.game_id)]
+                    stats['matches_played'] += 1
+                    stats['matches_won'] += int(team_id == match.winner_id)
+        return counters
+
+    @staticmethod
+    def update_stats(counters):
+        # Chunks keep the number of query parameters of increment_many low
+        keys = sorted(counters)
+        for start in range(0, len(keys), 500):
+            with transaction.atomic():
+                PlayerGameStats.increment_many({key: counters[key] for key in keys[start:start + 500]})
+
+    def sample(self):
+        match = self.matches[0] if self.matches else None
+        tournament = match.tournament if match else self.tournaments[0]
+        team = match.team_1 if match else self.teams[0]
+        game = tournament.game
+        return League(genre=game.genre, game=game, game_mode=tournament.game_mode, tournament=tournament,
+                      clan=team.clan, team=team, player=team.leader, match=match)
+
+    # Builds the whole league, returns number of generated deaths
+    def build(self, genres, games, sponsors, clans, players, teams, tournaments, teams_per_tournament, matches,
+              pendings=0, upcoming=0.1):
+        self.log('Creating games')
+        self.create_genres(genres)
+        self.create_game_modes()
+        self.create_games(games)
+        self.create_sponsors(sponsors)
+        self.log('Creating {0} players in {1} clans'.format(players, clans))
+        self.create_clans(clans)
+        self.create_players(players)
+        self.log('Creating {0} teams'.format(teams))
+        self.create_teams(teams)
+        self.create_tournaments(tournaments, upcoming)
+        self.register_teams(teams_per_tournament)
+        self.create_pendings(pendings)
+        self.log('Creating {0} matches'.format(matches))
+        self.create_matches(matches)
+        deaths = self.create_events()
+
+        # Bulk inserts don't send signals which invalidate cached data
+        for model in (Genre, GameMode, Game, Sponsor, Sponsorship, Tournament, RegisteredTeams, Clan, Team, Player,
+                      User, Match, PlayedMatch, Death, Assist, PlayerGameStats):
+            invalidate_model_cache(model)
+        invalidate_tournament_cache()
+        return deaths
+
+
+# League with given number of teams used by benchmarks, every team
+# plays roughly matches_per_team matches
+def build_league(team_count=10, matches_per_team=2, seed=None):
+    seeder = LeagueSeeder(seed=seed)
+    seeder.build(genres=1, games=2, sponsors=3, clans=team_count, players=team_count * 6, teams=team_count,
+                 tournaments=max(1, team_count // 8), teams_per_tournament=8,
+                 matches=team_count * matches_per_team // 2, pendings=team_count, upcoming=0)
+    return seeder.sample()
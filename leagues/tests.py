@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+from django.test import TestCase
+from django.utils import timezone
+from leagues.models import GameMode, Match
+from leagues.pagination import KeysetPaginator
+
+
+class KeysetPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        mode = GameMode.objects.create(name='Duel', team_player_count=1)
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        # Beginnings differ only in microseconds inside the same millisecond
+        # and several matches share a beginning, so the id decides their order
+        Match.objects.bulk_create(
+            Match(game_mode=mode, beginning=start + timedelta(microseconds=(number * 7) % 5))
+            for number in range(23)
+        )
+        cls.ordering = ['-beginning', '-id']
+        cls.expected = list(Match.objects.order_by(*cls.ordering).values_list('pk', flat=True))
+
+    def paginator(self):
+        return KeysetPaginator(Match.objects.all(), self.ordering, per_page=5)
+
+    def test_cursors_keep_microseconds(self):
+        paginator = self.paginator()
+        page = paginator.page()
+        self.assertEqual(paginator.page(after=page.next_cursor).object_list[0].beginning,
+                         Match.objects.order_by(*self.ordering)[5].beginning)
+
+    def test_walk_forward_and_backward(self):
+        paginator = self.paginator()
+        pages = [paginator.page()]
+        while pages[-1].has_next:
+            pages.append(paginator.page(after=pages[-1].next_cursor))
+        forward = [[match.pk for match in page] for page in pages]
+        self.assertEqual([pk for page in forward for pk in page], self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        page = pages[-1]
+        backward = [forward[-1]]
+        while page.has_previous:
+            page = paginator.page(before=page.previous_cursor)
+            backward.insert(0, [match.pk for match in page])
+        self.assertEqual(backward, forward)
@@ -20,6 +20,7 @@ urlpatterns = [
     path('games/', views.GamesView.as_view(), name='games'),
     path('social/', views.SocialView.as_view(), name='social'),
     path('settings/', views.SettingsView.as_view(), name='settings'),
+    path('stats/', views.StatsView.as_view(), name='stats'),
     path('tournaments/', views.TournamentView.as_view(), name='tournaments'),
     path('tournament/<slug:slug>/', views.TournamentDetailView.as_view(), name='tournament_detail'),
     path('gamemode/<slug:slug>/', views.GameModeDetailView.as_view(), name='game_mode_detail')
@@ -1,5 +1,6 @@
 from django.shortcuts import render
-from django.http import HttpResponseRedirect, JsonResponse
+from django.template.loader import render_to_string
+from django.http import HttpResponseRedirect, JsonResponse, Http404
 from django.urls import reverse
 from django.views import generic, View
 from django.views.decorators.cache import never_cache
@@ -7,13 +8,20 @@ from django.utils.decorators import method_decorator
 from django.contrib.auth import login, logout, views as auth_views
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.http import HttpResponseForbidden
+from django.http import HttpResponseForbidden, HttpResponseBadRequest
 from django.forms.models import model_to_dict
+from django.utils.functional import SimpleLazyObject
 from django_countries.fields import Country
-from random import randint, choice, sample
+from random import choice, sample
 from datetime import timedelta
+from functools import partial
 from leagues.forms import *
 from leagues.model_actions import *
+from leagues.match_simulation import random_duration, save_simulated_match
+from leagues.match_eligibility import tournament_candidates, team_1_candidates, team_2_candidates
+from leagues.pagination import KeysetListMixin
+from leagues.page_context import PageContext
+from leagues.instrumentation import read_records, summarize
 import json
 
 
@@ -66,9 +74,17 @@ class SignupView(View):
         return render(request, self.template_name, {'form': form})
 
 
-class SettingsView(LoginRequiredMixin, generic.TemplateView):
+# Choices of model select fields of given form, dictionary {field name: [(id, label)]}.
+# Choices of single selects start with empty choice
+def model_choices(form):
+    return {name: [(str(value), label) for value, label in field.choices]
+            for name, field in form.fields.items() if isinstance(field, forms.ModelChoiceField)}
+
+
+class SettingsView(LoginRequiredMixin, KeysetListMixin, generic.TemplateView):
     login_url = '/login/'
     template_name = "leagues/settings.html"
+    list_cache_timeout = 300
 
     def get_leader_queryset(self):
         if self.object_id:
@@ -135,17 +151,17 @@ class SettingsView(LoginRequiredMixin, generic.TemplateView):
             queryset = queryset.annotate(value=F('nickname')).values('id', 'value')
             self.response['leader_queryset'] = list(queryset)
 
+        # Other select dropdowns are rendered without options, see get_panel_context
+        for field_name, choices in model_choices(self.form_class()).items():
+            key = field_name + '_queryset'
+            if key not in self.response:
+                self.response[key] = [{'id': value, 'value': label} for value, label in choices if value]
+
     # Fills json response with default querysets for each HTML
     # select element so that we can restore its original state after
     # opening editing form which might have used different select options
     def get_create_modal_data(self):
-        form_instance = self.form_class()
-        form_fields_dict = dict(form_instance.fields)
-        # Convert choice fields to list of ids and names
-        for field_name, field in form_fields_dict.items():
-            if type(field) is forms.ModelChoiceField:
-                choice_list = list(field.choices)
-                self.response[field_name] = choice_list
+        self.response = model_choices(self.form_class())
 
     def change_user_acount_state(self, active):
         player = Player.objects.get(pk=self.object_id)
@@ -180,29 +196,99 @@ class SettingsView(LoginRequiredMixin, generic.TemplateView):
             Sponsor.__name__.lower(): (Sponsor, SponsorForm),
             Sponsorship.__name__.lower(): (Sponsorship, SponsorshipForm)
         }
+        # Unique ordering, related objects displayed in table of each model,
+        # models whose changes invalidate cached table and columns of the table
+        # sent to AJAX requests for the list
+        self.list_config = {
+            Game.__name__.lower(): (['slug'], ['genre'], [Game, Genre],
+                                    ['name', 'genre', 'publisher', 'release_date']),
+            Genre.__name__.lower(): (['slug'], [], [Genre], ['name', 'acronym']),
+            GameMode.__name__.lower(): (['slug'], [], [GameMode], ['name', 'team_player_count']),
+            Player.__name__.lower(): (['nickname'], ['user', 'clan'], [Player, User, Clan],
+                                      ['nickname', 'full_name', 'birth_date', 'country', 'clan', 'role_name']),
+            Team.__name__.lower(): (['slug'], ['leader', 'clan', 'game'], [Team, Player, Clan, Game],
+                                    ['name', 'active', 'founded', 'game', 'leader', 'clan']),
+            Clan.__name__.lower(): (['slug'], ['leader'], [Clan, Player], ['name', 'founded', 'country', 'leader']),
+            Tournament.__name__.lower(): (['slug'], [], [Tournament, Sponsor, Sponsorship],
+                                          ['name', 'main_sponsor', 'status_string', 'opening_date', 'end_date',
+                                           'prize']),
+            Sponsor.__name__.lower(): (['name'], [], [Sponsor], ['name']),
+            Sponsorship.__name__.lower(): (['pk'], ['sponsor', 'tournament'], [Sponsorship, Sponsor, Tournament],
+                                           ['sponsor', 'tournament', 'type', 'amount'])
+        }
+        # Panels (tabs) of the management page and models managed in them
+        self.panels = {
+            'Games': [Game.__name__.lower(), GameMode.__name__.lower(), Genre.__name__.lower()],
+            'Players': [Player.__name__.lower()],
+            'Teams': [Team.__name__.lower()],
+            'Clans': [Clan.__name__.lower()],
+            'Tournaments': [Tournament.__name__.lower(), Sponsor.__name__.lower(), Sponsorship.__name__.lower()]
+        }
 
-    def get_context_data(self, **kwargs):
-        self.context = super().get_context_data(**kwargs)
+    def prepare_keyset_page(self, name, page):
+        if name == Tournament.__name__.lower():
+            cache_tournament_sponsorships(page)
 
-        # For each model used on management page provide
-        # form instance and list of all objects
+    def get_keyset_lists(self):
+        lists = {}
         for key, config in self.used_models.items():
-            model_class = config[0]
-            form_class = config[1]
-            class_name = model_class.__name__.lower()
-            form_instance = form_class(prefix=class_name + '_form')
-            self.context[class_name + '_form'] = form_instance
-            self.context[class_name + '_list'] = model_class.objects.all()
+            ordering, related, _, fields = self.list_config[key]
+            lists[key] = (config[0].objects.select_related(*related), ordering, fields)
+        return lists
+
+    # Rendered tables are cached until any of displayed models changes
+    def get_list_cache_key(self, key):
+        params = self.request.GET
+        versions = [model_cache_version(model) for model in self.list_config[key][2]]
+        cursors = [params.get(key + '_after', ''), params.get(key + '_before', '')]
+        return ':'.join(versions + cursors)
+
+    def get_panel_name(self, class_name):
+        for panel, keys in self.panels.items():
+            if class_name in keys:
+                return panel
+
+    # Provides form instance and lazily evaluated list of objects
+    # for each model managed in given panel
+    def get_panel_context(self, panel):
+        context = {
+            'panel_template': 'leagues/settings/{0}.html'.format(panel.lower()),
+            'list_cache_timeout': self.list_cache_timeout,
+            'status': TournamentStatus.__members__,
+            'roles': UserRole.__members__,
+        }
+        for key in self.panels[panel]:
+            form_class = self.used_models[key][1]
+            form = form_class(prefix=key + '_form')
+            # Options of select dropdowns would list whole tables, they are
+            # loaded when a modal is opened, see open_create_modal and open_edit_modal
+            for field in form.fields.values():
+                if isinstance(field, forms.ModelChoiceField):
+                    field.queryset = field.queryset.none()
+            context[key + '_form'] = form
+            context[key + '_list'] = SimpleLazyObject(partial(self.get_keyset_page, key))
+            context[key + '_cache_key'] = self.get_list_cache_key(key)
+        return context
 
-        self.context['status'] = TournamentStatus.__members__
-        self.context['roles'] = UserRole.__members__
-        return self.context
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['panels'] = list(self.panels)
+        return context
 
     def get(self, request, *args, **kwargs):
         user = request.user
         if not user.is_staff and not user.is_superuser:
             return HttpResponseForbidden()
         if request.is_ajax():
+            if 'list' in request.GET:
+                return self.keyset_list_response(request.GET['list'])
+            if 'panel' in request.GET:
+                panel = request.GET['panel']
+                if panel not in self.panels:
+                    raise Http404('Unknown panel')
+                context = self.get_panel_context(panel)
+                return render(request, context['panel_template'], context)
+
             # Ajax calls are used to populate opened form with existing data
             # if editing object or with default data when creating new one
             if 'object_id' in request.GET:
@@ -252,7 +338,6 @@ class SettingsView(LoginRequiredMixin, generic.TemplateView):
         raise ValidationError(self.form_class.__name__ + ' validation failed')
 
     def post(self, request, *args, **kwargs):
-        self.context = self.get_context_data(**kwargs)
         self.object_id = request.POST['object_id']
         self.action_key = request.POST['action']
         if request.is_ajax():
@@ -264,6 +349,10 @@ class SettingsView(LoginRequiredMixin, generic.TemplateView):
             config = self.used_models[self.class_name]
             self.model_class = config[0]
             self.form_class = config[1]
+            # Only panel of the submitted form is rendered with the page
+            panel = self.get_panel_name(self.class_name)
+            self.context = PageContext(self.get_context_data(**kwargs), [partial(self.get_panel_context, panel)])
+            self.context['error_panel'] = panel
             try:
                 if self.action_key.endswith('_create'):
                     action = self.process_create_form
@@ -275,37 +364,27 @@ class SettingsView(LoginRequiredMixin, generic.TemplateView):
                 self.context['error_modal'] = self.class_name + '_form'
                 if self.object_id:
                     self.context['object_id'] = self.object_id
-                return render(request, self.template_name, self.context)
+                return render(request, self.template_name, self.context.build())
 
 
-class GamesView(generic.TemplateView):
+class GamesView(KeysetListMixin, generic.TemplateView):
     template_name = "leagues/games.html"
+    page_size = 24
+
+    def get_keyset_lists(self):
+        return {
+            'games': (Game.objects.select_related('genre'), ['slug'],
+                      ['name', 'image_url', 'release_date', 'genre', 'publisher']),
+        }
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        games = Game.objects.all()
-        context['game_list'] = games
-        edit_forms = []
-        for game in games:
-            edit_forms.append(GameForm(instance=game, prefix='game_edit_' + str(game.id)))
-        context['edit_forms'] = edit_forms
+        context['game_list'] = self.get_keyset_page('games')
         return context
 
 
-def template_enum(cls):
-    cls.do_not_call_in_templates = True
-    return cls
-
-
-@template_enum
-class MembershipStatus(Enum):
-    PENDING = 2
-    MEMBER = 1
-    NOT_MEMBER = 0
-
-
 @method_decorator(never_cache, name='dispatch')
-class SocialView(generic.TemplateView):
+class SocialView(KeysetListMixin, generic.TemplateView):
     template_name = "leagues/social.html"
 
     def cancel_team(self):
@@ -402,32 +481,49 @@ class SocialView(generic.TemplateView):
             'create_team': self.create_team,
         }
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    def get_keyset_lists(self):
+        teams = Team.objects.select_related('leader', 'clan')
+        clans = Clan.objects.select_related('leader')
+        team_fields = ['name', 'slug', 'leader', 'clan']
+        clan_fields = ['name', 'slug', 'leader']
         user = self.request.user
         if user.is_authenticated:
-            # Split all teams into 3 types and create tuple with membership info for each of them
-            player = user.player
-            joined_teams = player.teams.all()
-            pending_teams = player.team_pendings.all()
-            remaining_teams = Team.objects.all().difference(joined_teams).difference(pending_teams)
-            remaining_teams = list(map(lambda x: (x, MembershipStatus.NOT_MEMBER), remaining_teams))
-            joined_teams = list(map(lambda x: (x, MembershipStatus.MEMBER), joined_teams))
-            pending_teams = list(map(lambda x: (x, MembershipStatus.PENDING), pending_teams))
-
-            # Join all 3 types of teams into a single list
-            teams = joined_teams + pending_teams + remaining_teams
-            context['player'] = player
-            context['membership'] = MembershipStatus.__members__
-            context['clan_form'] = ClanForm(prefix='clan_form')
-            context['team_form'] = TeamForm(prefix='team_form')
-        else:
-            teams = list(map(lambda x: (x, MembershipStatus.NOT_MEMBER), Team.objects.all()))
+            # Annotate teams and clans with membership status of current player
+            teams = teams.with_membership(user.player)
+            clans = clans.with_membership(user.player)
+            team_fields.append('membership')
+            clan_fields.append('membership')
+
+        return {
+            'players': (Player.objects.with_match_stats(), ['nickname'], ['nickname', 'age', 'country', 'win_ratio']),
+            'teams': (teams, ['slug'], team_fields),
+            'clans': (clans, ['slug'], clan_fields),
+        }
 
-        context['player_list'] = Player.objects.all()
-        context['team_list'] = teams
-        context['clan_list'] = Clan.objects.all()
-        return context
+    def get_player_context(self):
+        user = self.request.user
+        if not user.is_authenticated:
+            return {}
+        return {
+            'player': user.player,
+            'membership': MembershipStatus.__members__,
+            'clan_form': ClanForm(prefix='clan_form'),
+            'team_form': TeamForm(prefix='team_form'),
+        }
+
+    def get_list_context(self):
+        return {
+            'player_list': self.get_keyset_page('players'),
+            'team_list': self.get_keyset_page('teams'),
+            'clan_list': self.get_keyset_page('clans'),
+        }
+
+    def get_page_context(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        return PageContext(context, [self.get_player_context, self.get_list_context])
+
+    def get_context_data(self, **kwargs):
+        return self.get_page_context(**kwargs).build()
 
     def post(self, request, *args, **kwargs):
         self.action_key = request.POST['action']
@@ -439,10 +535,10 @@ class SocialView(generic.TemplateView):
             action()
             return JsonResponse(self.response)
 
-        self.context = self.get_context_data(**kwargs)
+        # Page is built after the action so it shows changed data
+        self.context = self.get_page_context(**kwargs)
         action()
-        context = self.get_context_data(**kwargs)
-        return render(request, self.template_name, context)
+        return render(request, self.template_name, self.context.build())
 
 
 @method_decorator(never_cache, name='dispatch')
@@ -470,11 +566,11 @@ class PlayerDetailView(generic.DetailView):
         context = super().get_context_data(**kwargs)
         player = self.get_object()
         edit_form = PlayerForm(instance=self.object, prefix='player_form')
-        games = Game.objects.filter(id__in=PlayedMatch.objects.filter(player=player).values_list("match__game_id"))
-        player_stats = []
-        for game in games:
-            player_stats.append((game, *player.game_stats(game)))
+        player_stats = PlayerGameStats.objects.filter(player=player, matches_played__gt=0).select_related('game')
         context['player_stats'] = player_stats
+        context['player_teams'] = player.teams.with_match_stats().select_related('leader')
+        context['played_matches'] = player.playedmatch_set.select_related('team', 'match__winner', 'match__tournament',
+                                                                          'match__game')
         context['player_form'] = edit_form
         return context
 
@@ -559,7 +655,7 @@ class TeamDetailView(generic.DetailView):
             self.team.clan_pending = clan
             self.team.save()
             return HttpResponseRedirect(reverse("leagues:team_detail", args=[self.team.slug]))
-        return render(request, self.template_name, self.context)
+        return render(request, self.template_name, self.context.build())
 
     def cancel_clan_request(self):
         self.team.clan_pending = None
@@ -572,7 +668,7 @@ class TeamDetailView(generic.DetailView):
             return HttpResponseRedirect(reverse("leagues:team_detail", args=[self.team.slug]))
         self.context['edit_form'] = edit_form
         self.context['team'] = self.get_object()
-        return render(request, self.template_name, self.context)
+        return render(request, self.template_name, self.context.build())
 
     def __init__(self):
         super().__init__()
@@ -597,28 +693,22 @@ class TeamDetailView(generic.DetailView):
             'cancel_clan_request': self.cancel_clan_request,
         }
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    def get_team_context(self):
+        context = {}
         self.team = self.get_object()
         members = self.team.team_members.all()
+        played = grouped_match_stats(PlayedMatch.objects.filter(team=self.team), 'player', Q(won=True))
         member_matches = []
-        for member in members:
-            team_matches = PlayedMatch.objects.filter(team=self.team, player=member)
-            won_matches = team_matches.filter(match__winner=self.team)
+        for member in members.with_match_stats():
+            team_matches, won_matches = played.get(member.id, (0, 0))
             member_matches.append((member, team_matches, won_matches))
 
         registered = Tournament.objects.filter(team=self.team)
         non_registered = Tournament.objects.filter(Q(game=self.team.game) & ~Q(team=self.team))
 
         if not self.team.clan_pending:
-            clan_id_list = []
-            for clan in Clan.objects.all():
-                # Check if all team members are members of this clan
-                if not members.exclude(clan=clan).exists():
-                    clan_id_list.append(clan.id)
-            queryset = Clan.objects.filter(pk__in=clan_id_list)
             clan_join_form = TeamFormUser(instance=self.team, prefix='clan_join')
-            clan_join_form.fields['clan'].queryset = queryset
+            clan_join_form.fields['clan'].queryset = self.team.eligible_clans()
             context['clan_form'] = clan_join_form
 
         edit_form = TeamForm(instance=self.team, prefix='edit_form')
@@ -629,13 +719,23 @@ class TeamDetailView(generic.DetailView):
         context['registered'] = registered
         context['non_registered'] = non_registered
         context['member_matches'] = member_matches
+        context['team_pendings'] = self.team.team_pendings.select_related('clan')
+        context['team_matches'] = self.team.all_matches.select_related('team_1', 'team_2', 'winner', 'tournament',
+                                                                       'game')
         context['edit_form'] = edit_form
         context['status'] = TournamentStatus.__members__
         return context
 
+    def get_page_context(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        return PageContext(context, [self.get_team_context])
+
+    def get_context_data(self, **kwargs):
+        return self.get_page_context(**kwargs).build()
+
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
-        self.context = self.get_context_data(**kwargs)
+        self.context = self.get_page_context(**kwargs)
         self.team = self.object
         self.action_key = request.POST['action']
         action = self.actions[self.action_key]
@@ -664,34 +764,32 @@ class ClanDetailView(generic.DetailView):
         self.clan = self.get_object()
 
         # Get played and won matches under this clan by each member
+        played = grouped_match_stats(PlayedMatch.objects.filter(clan=self.clan), 'player', Q(won=True))
         member_stats = []
         for member in self.clan.clan_members.all():
-            matches = PlayedMatch.objects.filter(player=member, clan=self.clan)
-            matches_won = matches.filter(team=F('match__winner'))
-            matches_total = matches.count()
-            matches_won = matches_won.count()
+            matches_total, matches_won = played.get(member.id, (0, 0))
             win_ratio = self.win_ratio(matches_won, matches_total)
             member_stats.append((member, matches_total, matches_won, win_ratio))
 
-        # Get played and won matches in each game
-        clan_matches = self.clan.all_matches
-        win_ratio = self.clan.win_ratio
-        matches_won = self.clan.matches_won
-        stats = (clan_matches.count(), matches_won.count(), win_ratio)
-
+        # Get played and won matches in each game, overall stats are their sums
+        per_game = grouped_match_stats(self.clan.all_matches, 'game', Q(clan_winner=self.clan))
+        games = Game.objects.in_bulk(list(per_game))
         game_stats = []
-        for game in Game.objects.all():
-            matches = game.match_set.filter(Q(clan_1=self.clan) | Q(clan_2=self.clan))
-            matches_total = matches.count()
-            if matches_total > 0:
-                won_count = matches.filter(clan_winner=self.clan).count()
-                win_ratio = self.win_ratio(won_count, matches_total)
-                game_stats.append((game, won_count, matches_total, win_ratio))
+        for game in sorted(games.values(), key=lambda game: game.name):
+            matches_total, won_count = per_game[game.id]
+            win_ratio = self.win_ratio(won_count, matches_total)
+            game_stats.append((game, won_count, matches_total, win_ratio))
+
+        matches_total = sum(total for total, _ in per_game.values())
+        matches_won = sum(won for _, won in per_game.values())
+        stats = (matches_total, matches_won, self.win_ratio(matches_won, matches_total))
 
         context['stats'] = stats
         context['member_stats'] = member_stats
         context['game_stats'] = game_stats
         context['membership_requests'] = self.clan.clan_pendings.all()
+        context['clan_teams'] = self.clan.team_set.with_match_stats().select_related('leader')
+        context['team_requests'] = self.clan.team_requests.with_match_stats().select_related('leader')
         return context
 
     def force_leave_clan(self):
@@ -761,58 +859,38 @@ class ClanDetailView(generic.DetailView):
         return JsonResponse(self.response)
 
 
-class TournamentView(generic.TemplateView):
+class TournamentView(KeysetListMixin, generic.TemplateView):
     template_name = "leagues/tournaments.html"
 
+    def get_keyset_lists(self):
+        matches = Match.objects.select_related('team_1', 'team_2', 'winner', 'tournament', 'game')
+        return {
+            'tournaments': (Tournament.objects.all(), ['slug'],
+                            ['name', 'slug', 'main_sponsor', 'status_string', 'opening_date', 'end_date', 'prize']),
+            # Read backwards along match_beginning_idx
+            'matches': (matches, ['-beginning', '-id'],
+                        ['team_1', 'team_2', 'beginning', 'duration_fmt', 'winner', 'tournament']),
+        }
+
+    def prepare_keyset_page(self, name, page):
+        if name == 'tournaments':
+            cache_tournament_sponsorships(page)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        tournaments = Tournament.objects.all()
-        matches = Match.objects.all()
-        context['tournaments'] = tournaments
-        context['matches'] = matches
+        context['tournaments'] = self.get_keyset_page('tournaments')
+        context['matches'] = self.get_keyset_page('matches')
         context['match_form'] = MatchForm()
         return context
 
-    def generateStats(self, match, players_1, players_2):
-        event_interval = match.duration_seconds // (30 + 1)
-        event_time = 0
-        while 1:
-            event_time += randint(15, event_interval)
-            if event_time >= match.duration_seconds:
-                break
-            num_of_assists = randint(0, match.game_mode.team_player_count - 2)
-            who = randint(1, 2)
-            if who == 1:
-                victim = sample(players_1, 1)
-                killer = sample(players_2, 1)
-                possible_assists = players_2.copy()
-                possible_assists.remove(killer[0])
-            else:
-                victim = sample(players_2, 1)
-                killer = sample(players_1, 1)
-                possible_assists = players_1.copy()
-                possible_assists.remove(killer[0])
-
-            death = Death(match=match, victim_id=victim[0], killer_id=killer[0],
-                          match_time=timedelta(seconds=event_time))
-            death.save()
-            for i in range(num_of_assists):
-                assist_type = choice(['HEALING', 'DAMAGE'])
-                assist_player = sample(possible_assists, 1)
-                possible_assists.remove(assist_player[0])
-                assist = Assist(death=death, player_id=assist_player[0], type=assist_type)
-                assist.save()
-
     def get(self, request, *args, **kwargs):
+        if request.is_ajax() and 'list' in request.GET:
+            return self.keyset_list_response(request.GET['list'])
+
         context = self.get_context_data(**kwargs)
-        tournaments = Tournament.objects.all()
-        form_data = set()
+        form_data = []
         if request.user.is_authenticated:
-            for tournament in tournaments:
-                teams = RegisteredTeams.objects.filter(tournament=tournament)
-                if teams.count() >= 2 and teams.filter(team__leader=request.user.player) \
-                        and tournament.opening_date <= timezone.now().date() <= tournament.end_date:
-                    form_data.add(tournament)
+            form_data = Tournament.objects.open_for_matches(request.user.player)
 
         context['match_form_data'] = form_data
         return render(request, self.template_name, context)
@@ -831,10 +909,7 @@ class TournamentView(generic.TemplateView):
             try:
                 tournament_id = int(form_data_dict['match_create-tournament'])
                 tournament = Tournament.objects.get(pk=tournament_id)
-                registered_teams = RegisteredTeams.objects.all().filter(tournament=tournament)
-                for team in registered_teams:
-                    if not team.team.is_playing:
-                        dictionaries.append(team.team.as_array())
+                dictionaries = [team.as_array() for team in tournament_candidates(tournament)]
                 response_data['teams'] = json.dumps({"data": dictionaries})
                 response_data['tournament'] = tournament.id
                 response_data['status'] = "pick_teams"
@@ -857,12 +932,8 @@ class TournamentView(generic.TemplateView):
             game = int(form_data_dict['game_mode-game'])
             game_mode = int(form_data_dict['match_create-game_mode'])
             player_id = int(form_data_dict['player_id'])
-            possible_teams = Team.objects.filter(game_id=game, active=True)
-            for t in possible_teams:
-                if (t.team_members.all().count() >= GameMode.objects.get(pk=game_mode).team_player_count) \
-                        and t.team_members.filter(id=player_id).exists() and not t.is_playing:
-                    valid_team = [t.id, t.name]
-                    dictionaries.append(valid_team)
+            count = GameMode.objects.get(pk=game_mode).team_player_count
+            dictionaries = [team.as_array() for team in team_1_candidates(game, count, player_id)]
             response_data['teams_1'] = json.dumps({"data": dictionaries})
             response_data['game'] = game
             response_data['game_mode'] = game_mode
@@ -873,18 +944,8 @@ class TournamentView(generic.TemplateView):
             game_mode = int(form_data_dict['team_1-game_mode'])
             team_1 = int(form_data_dict['team_1'])
             team = Team.objects.get(pk=team_1)
-            possible_teams = Team.objects.filter(Q(game_id=game) & Q(active=True) & ~Q(clan=team.clan))
-            for t in possible_teams:
-                players1 = set(t.team_members.all())
-                players2 = set(team.team_members.all())
-                players = len(players1.intersection(players2))
-                players1 = len(players1) - players
-                count = GameMode.objects.get(pk=game_mode).team_player_count
-                # if distinct number of player of both teams can make together
-                if (players1 + len(players2)) >= (2 * count) and (players1 + players) >= count \
-                        and not t.is_playing:
-                    valid_team = [t.id, t.name]
-                    dictionaries.append(valid_team)
+            count = GameMode.objects.get(pk=game_mode).team_player_count
+            dictionaries = [t.as_array() for t in team_2_candidates(team, game, count)]
             response_data['teams_2'] = json.dumps({"data": dictionaries})
             response_data['game'] = game
             response_data['game_mode'] = game_mode
@@ -897,73 +958,47 @@ class TournamentView(generic.TemplateView):
             team_1_id = int(form_data_dict['team_2-team1'])
             team_2_id = int(form_data_dict['team_2'])
             player_id = int(form_data_dict['player_id'])
-            minutes = randint(20, 59)
-            seconds = randint(0, 59)
             mode = GameMode.objects.get(pk=game_mode)
             winner = choice((team_1_id, team_2_id))
-            match = Match(game_id=game, game_mode_id=game_mode, team_1_id=team_1_id, team_2_id=team_2_id,
-                          duration=timedelta(minutes=minutes, seconds=seconds), winner_id=winner)
-            match.save()
+            match = Match(game_id=game, game_mode=mode, team_1_id=team_1_id, team_2_id=team_2_id,
+                          duration=random_duration(), winner_id=winner)
 
-            # random players for first team
+            # random players for first team, player creating the match always plays
             team_1 = Team.objects.get(pk=team_1_id)
             players_1 = set(team_1.team_members.all().values_list('id', flat=True))
-            player = {Player.objects.get(pk=player_id).id}
-            players_1 -= player
+            players_1.discard(player_id)
             count = mode.team_player_count
-            played = PlayedMatch(player_id=player_id, team=team_1, clan=team_1.clan, match=match)
-            played.save()
-            p1 = sample(players_1, count - 1)
-            for i in range(0, count - 1):
-                played = PlayedMatch(player_id=p1[i], team=team_1, clan=team_1.clan, match=match)
-                played.save()
-
-            p1 = set(p1)
-            p1.add(player_id)
+            p1 = [player_id] + sample(sorted(players_1), count - 1)
 
             # random players for second team
             team_2 = Team.objects.get(pk=team_2_id)
             players_2 = set(team_2.team_members.all().values_list('id', flat=True))
-            players_2 -= p1
-            p2 = sample(players_2, count)
-            for i in range(0, count):
-                played = PlayedMatch(player_id=p2[i], team=team_2, clan=team_2.clan, match=match)
-                played.save()
-
-            self.generateStats(match, p1, p2)
+            players_2 -= set(p1)
+            p2 = sample(sorted(players_2), count)
 
+            save_simulated_match(match, p1, p2)
             return JsonResponse(response_data)
         elif action_key == 'match_done':
             team_1_id = int(form_data_dict['match_create-team_1'])
             team_2_id = int(form_data_dict['match_create-team_2'])
             tournament = int(form_data_dict['tournament'])
             t = Tournament.objects.get(pk=tournament)
-            minutes = randint(20, 59)
-            seconds = randint(0, 59)
             winner = choice((team_1_id, team_2_id))
             match = Match(tournament=t, game=t.game, game_mode=t.game_mode, team_1_id=team_1_id, team_2_id=team_2_id,
-                          duration=timedelta(minutes=minutes, seconds=seconds), winner_id=winner)
-            match.save()
+                          duration=random_duration(), winner_id=winner)
 
             # random players for first team
             team_1 = Team.objects.get(pk=team_1_id)
-            players = set(team_1.team_members.all().values_list('id', flat=True))
+            players = team_1.team_members.all().values_list('id', flat=True)
             count = t.game_mode.team_player_count
-            p1 = sample(players, count)
-            for i in range(0, count):
-                played = PlayedMatch(player_id=p1[i], team=team_1, clan=team_1.clan, match=match)
-                played.save()
+            p1 = sample(sorted(players), count)
 
             # random players for second team
             team_2 = Team.objects.get(pk=team_2_id)
-            players = set(team_2.team_members.all().values_list('id', flat=True))
-            p2 = sample(players, count)
-            for i in range(0, count):
-                played = PlayedMatch(player_id=p2[i], team=team_2, clan=team_2.clan, match=match)
-                played.save()
-
-            self.generateStats(match, p1, p2)
+            players = team_2.team_members.all().values_list('id', flat=True)
+            p2 = sample(sorted(players), count)
 
+            save_simulated_match(match, p1, p2)
             return JsonResponse(response_data)
 
         return HttpResponseRedirect(reverse("leagues:tournaments"))
@@ -972,28 +1007,48 @@ class TournamentView(generic.TemplateView):
 class MatchDetailView(generic.DetailView):
     template_name = "leagues/match_detail.html"
     model = Match
+    queryset = Match.objects.select_related('game', 'game_mode', 'tournament', 'team_1', 'team_2', 'winner')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        match = self.get_object()
-        players_1 = list(PlayedMatch.objects.filter(match=match, team=match.team_1))
-        players_2 = list(PlayedMatch.objects.filter(match=match, team=match.team_2))
-        players = []
-        filtered_deaths = set()
-        for i in range(len(players_1)):
-            players.append((players_1[i], players_2[i]))
-
-        deaths = Death.objects.filter(match=match)
-        for death in deaths:
-            if (match.beginning + death.match_time) <= timezone.now():
-                filtered_deaths.add(death)
-
-        context['deaths'] = filtered_deaths
+        match = self.object
+        played = PlayedMatch.objects.filter(match=match).select_related('player')
+        players_1 = [record for record in played if record.team_id == match.team_1_id]
+        players_2 = [record for record in played if record.team_id == match.team_2_id]
+        players = list(zip(players_1, players_2))
+
+        # Deaths which already happened, cursor is used to poll for newer ones
+        elapsed = match.elapsed
+        context['deaths'] = match.deaths_between(None, elapsed)
+        context['events_cursor'] = elapsed.total_seconds()
         context['assist_num'] = range(1, match.game_mode.team_player_count - 1)
         context['teams'] = (match.team_1, match.team_2)
         context['players'] = players
         return context
 
+    # Returns rows of deaths which happened after the time given by
+    # client cursor together with new cursor
+    def events_response(self, after):
+        match = self.get_object()
+        elapsed = match.elapsed
+        deaths = match.deaths_between(after, elapsed)
+        rows = ''.join(render_to_string('leagues/death_row.html', {'death': death, 'visible': True})
+                       for death in deaths)
+        return JsonResponse({
+            'rows': rows,
+            'cursor': elapsed.total_seconds(),
+            'in_progress': match.in_progress,
+        })
+
+    def get(self, request, *args, **kwargs):
+        if request.is_ajax() and 'after' in request.GET:
+            try:
+                after = parse_match_time(request.GET['after'])
+            except (ValueError, OverflowError):
+                return HttpResponseBadRequest('Invalid cursor')
+            return self.events_response(after)
+        return super().get(request, *args, **kwargs)
+
 
 class TournamentDetailView(generic.DetailView):
     template_name = "leagues/tournament_detail.html"
@@ -1002,25 +1057,20 @@ class TournamentDetailView(generic.DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         tournament = self.get_object()
-        teams = Team.objects.filter(tournaments=tournament)
-        team_matches = []
+        standings = list(tournament.standings())
+
+        # Team registered by clan of the current user, clan can register only one team
         registered = None
-        for team in teams:
-            if RegisteredTeams.objects.filter(team=team, tournament=tournament):
-                registered = team
-            all_matches = team.all_tournament_matches(tournament.id)
-            won_matches = team.matcher_won_tournament(tournament.id)
-            win_rate = team.win_ratio_tournament(tournament.id)
-            team_matches.append((team, all_matches, won_matches, win_rate))
-        matches = Match.objects.filter(tournament=tournament)
-        sponsors = Sponsorship.objects.filter(tournament=tournament)
-        try:
-            main_sponsor = sponsors.get(type='MAIN')
-        except Sponsorship.DoesNotExist:
-            main_sponsor = None
+        user = self.request.user
+        if user.is_authenticated and user.player.clan_id:
+            registered = next((team for team in standings if team.clan_id == user.player.clan_id), None)
+
+        matches = Match.objects.filter(tournament=tournament).select_related('team_1', 'team_2', 'winner', 'game')
+        sponsors = list(Sponsorship.objects.filter(tournament=tournament).select_related('sponsor'))
+        main_sponsor = next((sponsor for sponsor in sponsors if sponsor.type == 'MAIN'), None)
         context['registered'] = registered
         context['main_sponsor'] = main_sponsor
-        context['team_matches'] = team_matches
+        context['standings'] = standings
         context['matches'] = matches
         context['sponsors'] = sponsors
         return context
@@ -1065,17 +1115,20 @@ class TournamentDetailView(generic.DetailView):
         return HttpResponseRedirect(reverse("leagues:tournament_detail", args=[tournament.slug]))
 
 
-class GameDetailView(generic.DetailView):
+class GameDetailView(KeysetListMixin, generic.DetailView):
     template_name = "leagues/game_detail.html"
     model = Game
 
+    def get_keyset_lists(self):
+        player_stats = PlayerGameStats.objects.filter(game__slug=self.kwargs['slug'], matches_played__gt=0)
+        player_stats = player_stats.select_related('player__clan').annotate(nickname=F('player__nickname'))
+        return {
+            'players': (player_stats, ['nickname'], ['nickname', 'player__clan', 'kda', 'win_ratio']),
+        }
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        game = self.get_object()
-        player_stats = []
-        for player in game.players:
-            player_stats.append((player, *player.game_stats(game)))
-        context['player_stats'] = player_stats
+        context['player_stats'] = self.get_keyset_page('players')
         return context
 
 
@@ -1101,3 +1154,27 @@ class GenreDetailView(generic.DetailView):
         games = Game.objects.filter(genre=genre)
         context['games'] = games
         return context
+
+
+# Summary of request statistics collected by RequestStatsMiddleware
+class StatsView(LoginRequiredMixin, generic.TemplateView):
+    login_url = '/login/'
+    template_name = "leagues/stats.html"
+    sort_keys = ('latency_p95', 'latency_avg', 'queries_avg', 'queries_max', 'template_time_avg', 'requests')
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        if not user.is_staff and not user.is_superuser:
+            return HttpResponseForbidden()
+        return super().get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        sort = self.request.GET.get('sort')
+        if sort not in self.sort_keys:
+            sort = self.sort_keys[0]
+        records = read_records()
+        context['sort'] = sort
+        context['record_count'] = len(records)
+        context['views'] = summarize(records, sort)
+        return context